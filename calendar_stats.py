@@ -0,0 +1,142 @@
+"""
+Сводная статистика по событиям календаря
+
+Считает занятость и распределение встреч на стороне сервера, чтобы Claude
+получал короткую сводку вместо полного списка событий за квартал:
+
+1. Количество встреч и занятые часы по дням или неделям
+2. Суммарная и средняя длительность встреч
+3. Распределение по категориям и местам проведения
+
+Занятые часы считаются по объединению интервалов: две пересекающиеся
+встречи с 10:00 до 11:00 дают один занятый час, а не два. События на весь
+день и события, отмеченные как "свободен" (TRANSP:TRANSPARENT), например
+дни рождения, учитываются в количестве событий, но не в занятых часах.
+
+Автор: Alexander Gorlov
+Лицензия: MIT
+"""
+
+import datetime
+from collections import Counter, defaultdict
+from typing import List, Dict, Any, Tuple
+
+# Сколько категорий и мест показывать в сводке
+TOP_BREAKDOWN_SIZE = 10
+
+GROUP_BY_VALUES = ("day", "week")
+
+
+def _merged_duration(intervals: List[Tuple[datetime.datetime, datetime.datetime]]) -> datetime.timedelta:
+    """Длительность объединения интервалов"""
+    total = datetime.timedelta()
+    current_start = current_end = None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+
+def _hours(delta: datetime.timedelta) -> float:
+    return round(delta.total_seconds() / 3600, 2)
+
+
+def _group_key(day: datetime.date, group_by: str) -> str:
+    """Ключ группы: сама дата или понедельник ее недели (в ISO, чтобы сортировка была по времени)"""
+    if group_by == "week":
+        day = day - datetime.timedelta(days=day.weekday())
+    return day.isoformat()
+
+
+def compute_calendar_stats(events: List[Dict[str, Any]], start: datetime.datetime,
+                           end: datetime.datetime, group_by: str = "week") -> Dict[str, Any]:
+    """
+    Посчитать статистику по событиям за период за один проход
+
+    Args:
+        events (List[Dict[str, Any]]): События в формате YandexCalendarEvents._parse_ical_event
+        start (datetime.datetime): Начало периода
+        end (datetime.datetime): Конец периода
+        group_by (str): Группировка: "day" или "week". По умолчанию: "week"
+
+    Returns:
+        Dict[str, Any]: Сводка (несколько сотен байт в JSON)
+
+    Повторяющиеся события должны быть переданы по одному словарю
+    на каждое повторение (как их возвращает fetch_events).
+    """
+    if group_by not in GROUP_BY_VALUES:
+        raise ValueError(f"Неизвестная группировка: {group_by}. Допустимо: {', '.join(GROUP_BY_VALUES)}")
+
+    # Занятые интервалы, разрезанные по границам суток: день -> [(начало, конец)]
+    day_intervals: Dict[datetime.date, List[Tuple[datetime.datetime, datetime.datetime]]] = defaultdict(list)
+    group_counts: Counter = Counter()
+    categories: Counter = Counter()
+    locations: Counter = Counter()
+    total_duration = datetime.timedelta()
+    timed_events = 0
+    count = 0
+
+    for event in events:
+        if 'start_time' not in event:
+            continue
+        event_start = datetime.datetime.fromisoformat(event['start_time'])
+        event_end = datetime.datetime.fromisoformat(event['end_time']) if 'end_time' in event else event_start
+        if event_end <= start and event_start < start or event_start >= end:
+            continue
+
+        count += 1
+        group_counts[_group_key(event_start.date(), group_by)] += 1
+        for category in event.get('categories', []):
+            if category.strip():
+                categories[category.strip()] += 1
+        if event.get('location'):
+            locations[event['location']] += 1
+
+        if event_end <= event_start or event.get('all_day') \
+                or event.get('transparency', '').upper() == 'TRANSPARENT':
+            continue
+        timed_events += 1
+        total_duration += event_end - event_start
+
+        cursor = max(event_start, start)
+        clipped_end = min(event_end, end)
+        while cursor < clipped_end:
+            next_day = datetime.datetime.combine(cursor.date() + datetime.timedelta(days=1), datetime.time())
+            day_intervals[cursor.date()].append((cursor, min(next_day, clipped_end)))
+            cursor = next_day
+
+    group_busy: Dict[str, datetime.timedelta] = defaultdict(datetime.timedelta)
+    busy_total = datetime.timedelta()
+    for day, intervals in day_intervals.items():
+        busy = _merged_duration(intervals)
+        group_busy[_group_key(day, group_by)] += busy
+        busy_total += busy
+
+    groups = sorted(set(group_counts) | set(group_busy))
+    return {
+        # Конец периода не включается, показываем последний день периода
+        "period": {"start": start.strftime('%d.%m.%Y'),
+                   "end": (end - datetime.timedelta(microseconds=1)).strftime('%d.%m.%Y')},
+        "events": count,
+        "busy_hours": _hours(busy_total),
+        "total_event_hours": _hours(total_duration),
+        "average_duration_minutes": round(total_duration.total_seconds() / 60 / timed_events) if timed_events else 0,
+        f"by_{group_by}": [
+            {
+                group_by: datetime.date.fromisoformat(key).strftime('%d.%m.%Y'),
+                "events": group_counts.get(key, 0),
+                "busy_hours": _hours(group_busy.get(key, datetime.timedelta()))
+            }
+            for key in groups
+        ],
+        "categories": dict(categories.most_common(TOP_BREAKDOWN_SIZE)),
+        "locations": dict(locations.most_common(TOP_BREAKDOWN_SIZE)),
+    }
+
@@ -0,0 +1,191 @@
+"""
+Индекс событий по дням на скользящий горизонт (сегодня + N дней)
+
+Большинство вопросов касается сегодняшнего дня, завтра или текущей недели.
+Индекс хранит для каждого дня горизонта отсортированный по началу список
+событий, поэтому такой запрос - это просмотр нескольких корзин без
+обращения к серверу и без сортировки всего результата:
+
+1. Индекс заполняется одним запросом за весь горизонт
+2. Собственные изменения (создание, удаление) вносятся в индекс сразу
+3. После полуночи прошедшие дни отбрасываются, а с сервера догружаются
+   только новые дни в конце горизонта
+4. Изменения, сделанные в других клиентах, подхватываются полным
+   обновлением индекса раз в ttl секунд
+5. Ответ сервера, запрошенный до собственного изменения, в индекс не
+   попадает: иначе он вернул бы индексу состояние до этого изменения
+
+Автор: Alexander Gorlov
+Лицензия: MIT
+"""
+
+import time
+import bisect
+import datetime
+import itertools
+from typing import List, Dict, Any, Optional, Tuple
+
+
+class DayIndex:
+    def __init__(self, horizon_days: int = 14, ttl: float = 120):
+        """
+        Args:
+            horizon_days (int): Сколько дней, начиная с сегодняшнего, держать в индексе
+            ttl (float): Через сколько секунд индекс полностью обновляется с сервера
+        """
+        self.horizon_days = horizon_days
+        self.ttl = ttl
+        # день -> [(начало события в ISO, порядковый номер, событие)], отсортировано по началу.
+        # Номер нужен, чтобы при равном начале не сравнивать сами события
+        self._days: Dict[datetime.date, List[Tuple[str, int, Dict[str, Any]]]] = {}
+        self._sequence = itertools.count()
+        self._first_day: Optional[datetime.date] = None
+        self._end_day: Optional[datetime.date] = None
+        self._built_at = 0.0
+        # Номер версии содержимого: растет при каждом собственном изменении (add, remove,
+        # invalidate), чтобы load мог отбросить снимок, запрошенный до изменения
+        self.generation = 0
+
+    @staticmethod
+    def _bounds(event: Dict[str, Any]) -> Optional[Tuple[datetime.datetime, datetime.datetime]]:
+        if 'start_time' not in event:
+            return None
+        start = datetime.datetime.fromisoformat(event['start_time'])
+        end = datetime.datetime.fromisoformat(event['end_time']) if 'end_time' in event else start
+        return start, max(start, end)
+
+    def horizon(self, today: datetime.date) -> Tuple[datetime.datetime, datetime.datetime]:
+        """Границы горизонта индекса для указанного дня"""
+        start = datetime.datetime.combine(today, datetime.time())
+        return start, start + datetime.timedelta(days=self.horizon_days)
+
+    def covers(self, start: datetime.datetime, end: datetime.datetime) -> bool:
+        """Можно ли ответить на запрос за период по горизонту индекса (без учета свежести)"""
+        horizon_start, horizon_end = self.horizon(datetime.date.today())
+        return horizon_start <= start and end <= horizon_end
+
+    def missing_range(self, today: datetime.date) -> Optional[Tuple[datetime.datetime, datetime.datetime, bool]]:
+        """
+        Период, который нужно запросить с сервера, чтобы индекс покрывал горизонт
+
+        Прошедшие дни при этом отбрасываются (сдвиг горизонта после полуночи).
+
+        Returns:
+            Optional[Tuple]: (начало, конец, нужно ли перестроить индекс целиком)
+                или None, если индекс актуален
+        """
+        horizon_start, horizon_end = self.horizon(today)
+        stale = time.monotonic() - self._built_at >= self.ttl
+        if self._first_day is None or stale or self._end_day <= today:
+            return horizon_start, horizon_end, True
+
+        for day in [day for day in self._days if day < today]:
+            del self._days[day]
+        self._first_day = max(self._first_day, today)
+        if self._end_day < horizon_end.date():
+            return datetime.datetime.combine(self._end_day, datetime.time()), horizon_end, False
+        return None
+
+    def load(self, events: List[Dict[str, Any]], start: datetime.datetime, end: datetime.datetime,
+             rebuild: bool = True, generation: Optional[int] = None) -> bool:
+        """
+        Загрузить события с сервера за период
+
+        Args:
+            events: События за период (формат _parse_ical_event)
+            start, end: Период, за который получены события
+            rebuild (bool): Построить индекс заново или только догрузить новые дни
+            generation (int, optional): Значение generation перед запросом событий.
+                Если с тех пор индекс изменился, события не загружаются
+
+        Returns:
+            bool: Загружены ли события (False - снимок устарел, его нужно запросить заново)
+        """
+        if generation is not None and generation != self.generation:
+            return False
+        if rebuild or self._first_day is None:
+            self._days = {}
+            self._first_day = start.date()
+            self._built_at = time.monotonic()
+        else:
+            # Событие, начавшееся в уже проиндексированные дни, могло прийти повторно
+            for event in events:
+                self._discard(event.get('uid'), event.get('start_time'))
+        self._end_day = end.date()
+        for event in events:
+            self._insert(event)
+        return True
+
+    def add(self, event: Dict[str, Any]):
+        """Добавить событие во все дни горизонта, которые оно занимает"""
+        self.generation += 1
+        self._insert(event)
+
+    def _insert(self, event: Dict[str, Any]):
+        bounds = self._bounds(event)
+        if bounds is None or self._first_day is None:
+            return
+        event_start, event_end = bounds
+        day = max(event_start.date(), self._first_day)
+        # Событие, заканчивающееся ровно в полночь, следующий день не занимает
+        last_day = (event_end - datetime.timedelta(microseconds=1)).date() if event_end > event_start \
+            else event_start.date()
+        while day <= last_day and day < self._end_day:
+            bisect.insort(self._days.setdefault(day, []),
+                          (event['start_time'], next(self._sequence), event))
+            day += datetime.timedelta(days=1)
+
+    def remove(self, uid: Optional[str], start_time: Optional[str] = None):
+        """Удалить событие (все повторения или только одно с указанным началом)"""
+        self.generation += 1
+        self._discard(uid, start_time)
+
+    def _discard(self, uid: Optional[str], start_time: Optional[str] = None):
+        if not uid:
+            return
+        for day, items in self._days.items():
+            self._days[day] = [item for item in items
+                               if not (item[2].get('uid') == uid and (start_time is None or item[0] == start_time))]
+
+    def confirm(self, uid: str):
+        """Снять отметку pending с события, которое очередь записи сохранила на сервере"""
+        for items in self._days.values():
+            for _, _, event in items:
+                if event.get('uid') == uid:
+                    event.pop('pending', None)
+
+    def invalidate(self):
+        """Сбросить индекс: следующий запрос заново загрузит горизонт с сервера"""
+        self.generation += 1
+        self._first_day = None
+        self._end_day = None
+        self._days = {}
+
+    def query(self, start: datetime.datetime, end: datetime.datetime) -> List[Dict[str, Any]]:
+        """
+        События, пересекающиеся с периодом, отсортированные по началу
+
+        Просматриваются только корзины дней периода.
+        """
+        result = []
+        seen = set()
+        start_iso = start.isoformat()
+        end_iso = end.isoformat()
+        day = start.date()
+        while day < end.date() or (day == end.date() and end.time() != datetime.time()):
+            for start_time, _, event in self._days.get(day, []):
+                if start_time >= end_iso:
+                    break
+                # Событие, закончившееся до начала периода, не показываем
+                if start_time < start_iso and event.get('end_time', start_time) <= start_iso:
+                    continue
+                # Многодневное событие лежит в нескольких корзинах, но выводится один раз.
+                # Порядок по началу сохраняется: такое событие уже встретилось в первой
+                # корзине периода раньше всех событий следующих дней
+                key = (event.get('uid'), start_time)
+                if key in seen:
+                    continue
+                seen.add(key)
+                result.append(event)
+            day += datetime.timedelta(days=1)
+        return result
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+Массовый импорт и экспорт событий Яндекс Календаря в формате .ics
+
+Модуль позволяет переносить тысячи событий за один вызов, а не по одному
+событию на каждый вызов инструмента:
+
+1. Импорт: файл .ics читается построчно, события выгружаются по одному
+   объекту на UID. В памяти держится только текущий компонент, часовые пояса
+   и ограниченная очередь на выгрузку, поэтому размер файла не важен.
+   Выгрузка идет в несколько потоков с ограничением параллельности.
+   Переопределения повторений, идущие в файле не подряд с серией,
+   дописываются в уже выгруженный объект серии.
+2. Экспорт: события за период запрашиваются окнами по несколько недель
+   и дописываются в файл по мере получения. Серии выгружаются как есть
+   (RRULE, EXDATE и переопределения), без разворачивания в повторения.
+
+Повторный импорт того же файла безопасен: объекты создаются условным PUT
+(If-None-Match: *), уже существующие события пропускаются.
+
+Запуск из командной строки:
+    python ics_transfer.py import calendar.ics --concurrency 8
+    python ics_transfer.py export backup.ics --start 01.01.2025 --end 31.12.2025
+
+Автор: Alexander Gorlov
+Лицензия: MIT
+"""
+
+import os
+import sys
+import uuid
+import asyncio
+import argparse
+import datetime
+from typing import Dict, Any, List, Iterable, Iterator, Optional, Tuple
+
+from yandex_calendar_events2 import YandexCalendarEvents, DEFAULT_MAX_CONCURRENCY
+
+# Сколько дней запрашивать за один раз при экспорте
+EXPORT_WINDOW_DAYS = 30
+
+# Сколько ошибок импорта возвращать в отчете
+MAX_REPORTED_ERRORS = 10
+
+
+def _property_name(line: str) -> str:
+    """Имя свойства iCal без параметров (DTSTART;TZID=...:... -> DTSTART)"""
+    return line.split(':', 1)[0].split(';', 1)[0].upper()
+
+
+def _referenced_tzids(lines: List[str]) -> List[str]:
+    """TZID, на которые ссылаются свойства компонента"""
+    tzids = []
+    for line in lines:
+        head = line.split(':', 1)[0]
+        for param in head.split(';')[1:]:
+            name, _, value = param.partition('=')
+            value = value.strip('"')
+            if name.upper() == 'TZID' and value not in tzids:
+                tzids.append(value)
+    return tzids
+
+
+def _wrap_calendar(components: List[str]) -> str:
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//yandex-calendar-mcp//RU"]
+    lines += components
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(lines) + "\r\n"
+
+
+def iter_components(lines: Iterable[str]) -> Iterator[Tuple[str, List[str]]]:
+    """
+    Потоково разобрать .ics на компоненты верхнего уровня (VEVENT, VTIMEZONE, ...)
+
+    Вложенные компоненты (VALARM, STANDARD/DAYLIGHT) остаются внутри родителя,
+    перенесенные строки (folding) сохраняются как есть.
+
+    Yields:
+        Tuple[str, List[str]]: (тип компонента, его строки)
+    """
+    current: Optional[List[str]] = None
+    kind = None
+    depth = 0
+    for raw_line in lines:
+        line = raw_line.rstrip('\r\n')
+        if not line:
+            continue
+        is_continuation = line[:1] in (' ', '\t')
+        upper = line.upper()
+
+        if current is None:
+            if not is_continuation and upper.startswith('BEGIN:') and upper != 'BEGIN:VCALENDAR':
+                current = [line]
+                kind = upper[len('BEGIN:'):]
+                depth = 1
+            continue
+
+        current.append(line)
+        if is_continuation:
+            continue
+        if upper.startswith('BEGIN:'):
+            depth += 1
+        elif upper.startswith('END:'):
+            depth -= 1
+            if depth == 0:
+                yield kind, current
+                current = None
+
+
+def _property_value(lines: List[str], name: str) -> Optional[str]:
+    return next((line.split(':', 1)[1].strip() for line in lines
+                 if _property_name(line) == name), None)
+
+
+def iter_ics_objects(lines: Iterable[str]) -> Iterator[Tuple[Optional[str], str]]:
+    """
+    Потоково разобрать .ics на объекты календаря для выгрузки
+
+    Идущие подряд VEVENT с одинаковым UID (серия и ее переопределения)
+    объединяются в один объект. Если UID встречается снова не подряд,
+    выдается еще один объект с тем же UID (import_ics дописывает его
+    в первый). К каждому объекту добавляются VTIMEZONE, на которые он ссылается.
+
+    Args:
+        lines (Iterable[str]): Строки файла (например, открытый файл)
+
+    Yields:
+        Tuple[Optional[str], str]: (UID или None, текст объекта VCALENDAR)
+    """
+    timezones: Dict[str, List[str]] = {}
+    pending_uid = None
+    pending: List[List[str]] = []
+
+    def flush():
+        components = []
+        for component in pending:
+            for tzid in _referenced_tzids(component):
+                if tzid in timezones and timezones[tzid] not in components:
+                    components.append(timezones[tzid])
+        components += pending
+        return pending_uid, _wrap_calendar([line for component in components for line in component])
+
+    for kind, component in iter_components(lines):
+        if kind == 'VTIMEZONE':
+            tzid = _property_value(component, 'TZID')
+            if tzid:
+                timezones[tzid] = component
+        elif kind in ('VEVENT', 'VTODO', 'VJOURNAL'):
+            uid = _property_value(component, 'UID')
+            if pending and (uid is None or uid != pending_uid):
+                yield flush()
+                pending = []
+            pending_uid = uid
+            pending.append(component)
+
+    if pending:
+        yield flush()
+
+
+async def import_ics(calendar: YandexCalendarEvents, path: str,
+                     concurrency: int = 4) -> Dict[str, Any]:
+    """
+    Импортировать события из файла .ics
+
+    Запросы импорта проходят через общий предел одновременных запросов
+    аккаунта, поэтому concurrency больше calendar.max_concurrency не ускорит
+    выгрузку и уменьшается до него.
+
+    Args:
+        calendar (YandexCalendarEvents): Подключенный календарь
+        path (str): Путь к файлу .ics
+        concurrency (int): Сколько объектов выгружать одновременно. По умолчанию: 4
+
+    Returns:
+        Dict[str, Any]: Счетчики created/updated/skipped/failed и первые ошибки
+    """
+    concurrency = max(1, min(concurrency, calendar.max_concurrency))
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    report = {"created": 0, "updated": 0, "skipped": 0, "failed": 0, "errors": []}
+    # UID -> завершение первой выгрузки объекта с этим UID в этом импорте.
+    # Следующие объекты с тем же UID дописываются в него после ее завершения
+    uploads: Dict[str, asyncio.Future] = {}
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                queue.task_done()
+                return
+            uid, ical = item
+            # Регистрация до первого await: порядок выгрузок совпадает с порядком в файле
+            first_upload = uploads.get(uid) if uid else None
+            own_upload = None
+            if uid and first_upload is None:
+                own_upload = uploads[uid] = asyncio.get_running_loop().create_future()
+            try:
+                if not uid:
+                    uid = f"{uuid.uuid4()}@yandex.ru"
+                    ical = ical.replace("END:VEVENT", f"UID:{uid}\r\nEND:VEVENT")
+                if first_upload is not None:
+                    await first_upload
+                    status = await calendar.add_event_components(uid, ical)
+                    if status == "ok":
+                        report["updated"] += 1
+                    elif status == "unchanged":
+                        report["skipped"] += 1
+                    else:
+                        raise RuntimeError(f"не удалось дописать компоненты в объект события ({status})")
+                else:
+                    created = await calendar.save_event_object(uid, ical)
+                    report["created" if created else "skipped"] += 1
+            except Exception as e:
+                report["failed"] += 1
+                if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                    report["errors"].append(f"{uid}: {str(e)}")
+            finally:
+                if own_upload is not None:
+                    own_upload.set_result(None)
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        with open(path, encoding='utf-8') as f:
+            for item in iter_ics_objects(f):
+                await queue.put(item)
+    finally:
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    return report
+
+
+async def export_ics(calendar: YandexCalendarEvents, path: str,
+                     start: datetime.datetime, end: datetime.datetime) -> Dict[str, Any]:
+    """
+    Экспортировать события за период в файл .ics
+
+    Период запрашивается окнами по EXPORT_WINDOW_DAYS дней, каждое окно
+    сразу дописывается во временный файл, который заменяет path после
+    выгрузки всего периода. Серии записываются целиком (с RRULE
+    и переопределениями) и один раз, даже если попадают в несколько окон.
+
+    Args:
+        calendar (YandexCalendarEvents): Подключенный календарь
+        path (str): Путь к создаваемому файлу .ics
+        start (datetime.datetime): Начало периода
+        end (datetime.datetime): Конец периода
+
+    Returns:
+        Dict[str, Any]: Количество экспортированных объектов и путь к файлу
+    """
+    seen_uids = set()
+    written_tzids = set()
+    exported = 0
+
+    # Файл собирается рядом и заменяет прежний только целиком: при ошибке посреди
+    # выгрузки предыдущая копия по этому пути остается нетронутой
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//yandex-calendar-mcp//RU\r\n")
+            window_start = start
+            while window_start < end:
+                window_end = min(end, window_start + datetime.timedelta(days=EXPORT_WINDOW_DAYS))
+
+                for data in await calendar.search_event_objects(window_start, window_end):
+                    components = list(iter_components(data.splitlines()))
+                    uid = next((_property_value(component, 'UID') for kind, component in components
+                                if kind != 'VTIMEZONE'), None)
+                    if uid in seen_uids:
+                        continue
+                    seen_uids.add(uid)
+                    for kind, component in components:
+                        if kind == 'VTIMEZONE':
+                            tzid = _property_value(component, 'TZID')
+                            if tzid in written_tzids:
+                                continue
+                            written_tzids.add(tzid)
+                        f.write("\r\n".join(component) + "\r\n")
+                    exported += 1
+                window_start = window_end
+            f.write("END:VCALENDAR\r\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return {"exported": exported, "path": os.path.abspath(path)}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    max_concurrency = int(os.getenv("YANDEX_CALDAV_MAX_CONCURRENCY", str(DEFAULT_MAX_CONCURRENCY)))
+
+    parser = argparse.ArgumentParser(description="Импорт и экспорт событий Яндекс Календаря (.ics)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Импортировать события из файла .ics")
+    import_parser.add_argument("path", help="Путь к файлу .ics")
+    import_parser.add_argument("--concurrency", type=int, default=max_concurrency,
+                               help="Количество одновременных запросов "
+                                    "(по умолчанию: YANDEX_CALDAV_MAX_CONCURRENCY или 4)")
+
+    export_parser = subparsers.add_parser("export", help="Экспортировать события в файл .ics")
+    export_parser.add_argument("path", help="Путь к создаваемому файлу .ics")
+    export_parser.add_argument("--start", required=True, help="Начало периода, ДД.ММ.ГГГГ")
+    export_parser.add_argument("--end", required=True, help="Конец периода (включительно), ДД.ММ.ГГГГ")
+
+    args = parser.parse_args(argv)
+
+    calendar = YandexCalendarEvents(
+        caldav_url=os.getenv("YANDEX_CALDAV_URL", "https://caldav.yandex.ru"),
+        username=os.getenv("YANDEX_USERNAME"),
+        password=os.getenv("YANDEX_PASSWORD"),
+        # Скрипт работает отдельно от сервера: предел запросов задает --concurrency
+        max_concurrency=getattr(args, "concurrency", max_concurrency)
+    )
+    if not calendar.caldav_calendar:
+        print("Ошибка: не удалось подключиться к Яндекс Календарю", file=sys.stderr)
+        return 1
+
+    if args.command == "import":
+        report = asyncio.run(import_ics(calendar, args.path, args.concurrency))
+        print(f"Создано: {report['created']}, дополнено: {report['updated']}, "
+              f"пропущено (уже есть): {report['skipped']}, ошибок: {report['failed']}")
+        for error in report["errors"]:
+            print(f"  {error}", file=sys.stderr)
+        return 1 if report["failed"] else 0
+
+    start = datetime.datetime.strptime(args.start, "%d.%m.%Y")
+    end = datetime.datetime.strptime(args.end, "%d.%m.%Y") + datetime.timedelta(days=1)
+    report = asyncio.run(export_ics(calendar, args.path, start, end))
+    print(f"Экспортировано событий: {report['exported']} -> {report['path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
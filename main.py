@@ -10,6 +10,13 @@ MCP-сервер для Яндекс Календаря
 1. Получение предстоящих событий из календаря (get_upcoming_events)
 2. Создание новых событий в календаре (create_calendar_event)
 3. Удаление событий по их идентификатору (delete_calendar_event)
+4. Создание повторяющихся событий (create_recurring_event)
+5. Отмена и изменение одного повторения серии
+   (cancel_event_occurrence, modify_event_occurrence)
+6. Запрос занятости участников и подбор общего времени (get_free_busy)
+7. Массовый импорт и экспорт событий в .ics (import_ics_file, export_ics_file)
+8. Сводная статистика занятости (calendar_stats)
+9. Состояние очереди фоновой записи (get_write_queue_status)
 
 Сервер использует библиотеку FastMCP для организации взаимодействия
 с Claude через Model Context Protocol.
@@ -17,12 +24,14 @@ MCP-сервер для Яндекс Календаря
 Для работы требуется:
 - Учетные данные Яндекс (логин/пароль приложения)
 - Правильно настроенный .env файл
-- Установленные зависимости (mcp, httpx, caldav, python-dotenv)
+- Установленные зависимости (mcp, caldav, python-dotenv)
 
 Запуск:
     python main.py
     или
     mcp install main.py --name "Яндекс Календарь"
+    или по HTTP (например, для нагрузочного теста tests/load_test.py)
+    YANDEX_MCP_TRANSPORT=streamable-http python main.py
 
 Автор: Alexander Gorlov
 Лицензия: MIT
@@ -35,6 +44,9 @@ from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP, Context
 from yandex_calendar_events2 import YandexCalendarEvents
+from ics_transfer import import_ics, export_ics
+from calendar_stats import compute_calendar_stats
+from tool_profiler import profile_tool
 
 # Загрузка переменных окружения из файла .env (если есть)
 load_dotenv()
@@ -43,43 +55,109 @@ load_dotenv()
 CALDAV_URL = os.getenv("YANDEX_CALDAV_URL", "https://caldav.yandex.ru")
 USERNAME = os.getenv("YANDEX_USERNAME")
 PASSWORD = os.getenv("YANDEX_PASSWORD")
+# Файл для сохранения таблицы идемпотентности между перезапусками (необязательно)
+IDEMPOTENCY_FILE = os.getenv("YANDEX_IDEMPOTENCY_FILE")
+# Максимум одновременных запросов к CalDAV (защита от ответов 429 при всплесках)
+MAX_CONCURRENCY = int(os.getenv("YANDEX_CALDAV_MAX_CONCURRENCY", "4"))
+# Файл очереди записи. Если задан, создание и удаление событий подтверждаются
+# сразу, а в календарь отправляются в фоне (необязательно)
+WRITE_QUEUE_FILE = os.getenv("YANDEX_WRITE_QUEUE_FILE")
+# Индекс событий по дням: сколько дней вперед держать в памяти (0 - отключить)
+# и через сколько секунд обновлять его с сервера
+DAY_INDEX_DAYS = int(os.getenv("YANDEX_DAY_INDEX_DAYS", "14"))
+DAY_INDEX_TTL = float(os.getenv("YANDEX_DAY_INDEX_TTL", "120"))
+# Транспорт MCP: stdio (Claude Desktop) или streamable-http с адресом и портом
+# YANDEX_MCP_HOST и YANDEX_MCP_PORT (например, для нагрузочного теста по HTTP)
+MCP_TRANSPORT = os.getenv("YANDEX_MCP_TRANSPORT", "stdio")
+MCP_HOST = os.getenv("YANDEX_MCP_HOST", "127.0.0.1")
+MCP_PORT = int(os.getenv("YANDEX_MCP_PORT", "8000"))
 
 # Инициализация FastMCP сервера
-mcp = FastMCP("yandex-calendar")
+mcp = FastMCP("yandex-calendar", host=MCP_HOST, port=MCP_PORT)
 
 # Создание экземпляра класса YandexCalendarEvents
 calendar_event = YandexCalendarEvents(
     caldav_url=CALDAV_URL,
     username=USERNAME,
-    password=PASSWORD
+    password=PASSWORD,
+    idempotency_file=IDEMPOTENCY_FILE,
+    max_concurrency=MAX_CONCURRENCY,
+    day_index_days=DAY_INDEX_DAYS,
+    day_index_ttl=DAY_INDEX_TTL
 )
+if WRITE_QUEUE_FILE:
+    calendar_event.enable_write_queue(WRITE_QUEUE_FILE)
+
+DATE_TIME_FORMAT_ERROR = "Используйте формат ДД.ММ.ГГГГ для даты и ЧЧ:ММ для времени."
+
+
+def parse_date_time(date_str: str, time_str: str) -> datetime.datetime:
+    """
+    Преобразовать дату (ДД.ММ.ГГГГ) и время (ЧЧ:ММ) в datetime
+
+    Raises:
+        ValueError: Если дата или время заданы в неверном формате
+    """
+    day, month, year = map(int, date_str.split('.'))
+    hour, minute = map(int, time_str.split(':'))
+    return datetime.datetime(year, month, day, hour, minute)
+
 
 @mcp.tool()
-async def get_upcoming_events(days: int = 90, format_type: str = "json", ctx: Context = None) -> str:
+@profile_tool
+async def get_upcoming_events(
+    days: int = 90,
+    format_type: str = "json",
+    start_date: str = "",
+    end_date: str = "",
+    ctx: Context = None
+) -> str:
     """
     Получить предстоящие события из Яндекс Календаря.
 
+    Для вопросов про конкретные дни ("что у меня сегодня", "что на этой неделе")
+    лучше указывать start_date и end_date: такие запросы к ближайшим дням
+    обслуживаются из индекса без обращения к серверу.
+
     Args:
-        days (int): Количество дней для просмотра предстоящих событий. 
+        days (int): Количество дней для просмотра предстоящих событий, если end_date не указан.
                     По умолчанию: 90.
         format_type (str): Формат вывода: "text" или "json".
                     По умолчанию: "json".
+        start_date (str): Первый день периода в формате ДД.ММ.ГГГГ.
+                    По умолчанию: текущий момент.
+        end_date (str): Последний день периода (включительно) в формате ДД.ММ.ГГГГ.
+                    По умолчанию: начало периода + days.
         ctx (Context): Контекст MCP, предоставляемый автоматически.
 
     Returns:
         str: Форматированный текст или JSON с предстоящими событиями, или сообщение об ошибке.
     """
     if ctx:
-        await ctx.info(f"Получение предстоящих событий за {days} дней в формате {format_type}")
+        await ctx.info(f"Получение предстоящих событий ({start_date or 'сейчас'} - "
+                       f"{end_date or f'{days} дней'}) в формате {format_type}")
     
-    if not calendar_event.caldav_calendar:
+    if not await calendar_event.ensure_connected():
         error_msg = "Ошибка: не удалось подключиться к Яндекс Календарю. Проверьте учетные данные."
         if ctx:
             await ctx.error(error_msg)
         return error_msg
     
     try:
-        events_result = await calendar_event.get_upcoming_events(days, format_type)
+        try:
+            start = parse_date_time(start_date, "00:00") if start_date else None
+            end = None
+            if end_date:
+                end = parse_date_time(end_date, "00:00") + datetime.timedelta(days=1)
+            elif start:
+                end = start + datetime.timedelta(days=days)
+        except ValueError as e:
+            error_msg = f"Ошибка формата даты: {str(e)}. {DATE_TIME_FORMAT_ERROR}"
+            if ctx:
+                await ctx.error(error_msg)
+            return error_msg
+
+        events_result = await calendar_event.get_upcoming_events(days, format_type, start, end)
         
         # Если результат уже строка, то возвращаем его
         if isinstance(events_result, str):
@@ -96,12 +174,15 @@ async def get_upcoming_events(days: int = 90, format_type: str = "json", ctx: Co
 
 
 @mcp.tool()
+@profile_tool
 async def create_calendar_event(
     title: str, 
     start_date: str, 
     start_time: str, 
     duration_minutes: int = 60, 
     description: str = "", 
+    idempotency_key: str = "",
+    attendees: str = "",
     ctx: Context = None
 ) -> str:
     """
@@ -113,6 +194,9 @@ async def create_calendar_event(
         start_time (str): Время начала события в формате ЧЧ:ММ (например, 14:30).
         duration_minutes (int): Продолжительность события в минутах. По умолчанию: 60 минут.
         description (str): Описание события. По умолчанию: пустая строка.
+        idempotency_key (str): Ключ идемпотентности. При повторе вызова с тем же ключом
+                    событие не дублируется. По умолчанию: пустая строка (без дедупликации).
+        attendees (str): Email участников через запятую. По умолчанию: без участников.
         ctx (Context): Контекст MCP, предоставляемый автоматически.
 
     Returns:
@@ -121,7 +205,7 @@ async def create_calendar_event(
     if ctx:
         await ctx.info(f"Попытка создания события: {title} на {start_date} {start_time}")
     
-    if not calendar_event.caldav_calendar:
+    if not await calendar_event.ensure_writable():
         error_msg = "Ошибка: не удалось подключиться к Яндекс Календарю. Проверьте учетные данные."
         if ctx:
             ctx.error(error_msg)
@@ -130,20 +214,20 @@ async def create_calendar_event(
     try:
         # Преобразование строк даты и времени в datetime
         try:
-            day, month, year = map(int, start_date.split('.'))
-            hour, minute = map(int, start_time.split(':'))
-            
-            start = datetime.datetime(year, month, day, hour, minute)
+            start = parse_date_time(start_date, start_time)
             end = start + datetime.timedelta(minutes=duration_minutes)
             
         except ValueError as e:
-            error_msg = f"Ошибка формата даты или времени: {str(e)}. Используйте формат ДД.ММ.ГГГГ для даты и ЧЧ:ММ для времени."
+            error_msg = f"Ошибка формата даты или времени: {str(e)}. {DATE_TIME_FORMAT_ERROR}"
             if ctx:
                 await ctx.error(error_msg)
             return error_msg
         
         # Создание события
-        result = await calendar_event.create_event(title, start, end, description)
+        result = await calendar_event.create_event(
+            title, start, end, description, idempotency_key=idempotency_key or None,
+            attendees=attendees.split(',') if attendees else None
+        )
         
         if ctx:
             if "успешно" in result:
@@ -161,6 +245,7 @@ async def create_calendar_event(
 
 
 @mcp.tool()
+@profile_tool
 async def delete_calendar_event(event_uid: str, ctx: Context = None) -> str:
     """
     Удалить событие из Яндекс Календаря по его уникальному идентификатору.
@@ -175,7 +260,7 @@ async def delete_calendar_event(event_uid: str, ctx: Context = None) -> str:
     if ctx:
         await ctx.info(f"Попытка удаления события с ID: {event_uid}")
     
-    if not calendar_event.caldav_calendar:
+    if not await calendar_event.ensure_writable():
         error_msg = "Ошибка: не удалось подключиться к Яндекс Календарю. Проверьте учетные данные."
         if ctx:
             ctx.error(error_msg)
@@ -198,5 +283,485 @@ async def delete_calendar_event(event_uid: str, ctx: Context = None) -> str:
             await ctx.error(error_msg)
         return error_msg
 
+
+@mcp.tool()
+@profile_tool
+async def create_recurring_event(
+    title: str,
+    start_date: str,
+    start_time: str,
+    frequency: str,
+    duration_minutes: int = 60,
+    interval: int = 1,
+    count: int = 0,
+    until_date: str = "",
+    by_day: str = "",
+    description: str = "",
+    idempotency_key: str = "",
+    ctx: Context = None
+) -> str:
+    """
+    Создать повторяющееся событие (серию) в Яндекс Календаре.
+
+    Вся серия хранится одним объектом с правилом повторения, поэтому
+    еженедельная встреча на год - это один запрос, а не 52.
+
+    Args:
+        title (str): Название события.
+        start_date (str): Дата первого повторения в формате ДД.ММ.ГГГГ.
+        start_time (str): Время начала в формате ЧЧ:ММ.
+        frequency (str): Частота: "DAILY", "WEEKLY", "MONTHLY" или "YEARLY".
+        duration_minutes (int): Продолжительность одного повторения в минутах. По умолчанию: 60.
+        interval (int): Интервал (например, 2 при WEEKLY - раз в две недели). По умолчанию: 1.
+        count (int): Количество повторений. По умолчанию: 0 (без ограничения).
+        until_date (str): Дата окончания серии в формате ДД.ММ.ГГГГ. По умолчанию: без окончания.
+        by_day (str): Дни недели через запятую (MO,TU,WE,TH,FR,SA,SU). По умолчанию: пусто.
+        description (str): Описание события. По умолчанию: пустая строка.
+        idempotency_key (str): Ключ идемпотентности (см. create_calendar_event).
+        ctx (Context): Контекст MCP, предоставляемый автоматически.
+
+    Returns:
+        str: Сообщение о результате создания серии.
+    """
+    if ctx:
+        await ctx.info(f"Попытка создания серии: {title} с {start_date} {start_time} ({frequency})")
+
+    if not await calendar_event.ensure_writable():
+        error_msg = "Ошибка: не удалось подключиться к Яндекс Календарю. Проверьте учетные данные."
+        if ctx:
+            await ctx.error(error_msg)
+        return error_msg
+
+    try:
+        try:
+            start = parse_date_time(start_date, start_time)
+            end = start + datetime.timedelta(minutes=duration_minutes)
+            until = parse_date_time(until_date, "23:59") if until_date else None
+        except ValueError as e:
+            error_msg = f"Ошибка формата даты или времени: {str(e)}. {DATE_TIME_FORMAT_ERROR}"
+            if ctx:
+                await ctx.error(error_msg)
+            return error_msg
+
+        try:
+            rrule = calendar_event.build_rrule(
+                frequency, interval=interval, count=count or None, until=until,
+                by_day=by_day.split(',') if by_day else None
+            )
+        except ValueError as e:
+            error_msg = f"Ошибка правила повторения: {str(e)}"
+            if ctx:
+                await ctx.error(error_msg)
+            return error_msg
+
+        result = await calendar_event.create_event(
+            title, start, end, description,
+            idempotency_key=idempotency_key or None, rrule=rrule
+        )
+
+        if ctx:
+            if "успешно" in result:
+                await ctx.info(result)
+            else:
+                await ctx.error(result)
+
+        return result
+
+    except Exception as e:
+        error_msg = f"Ошибка при создании серии: {str(e)}"
+        if ctx:
+            await ctx.error(error_msg)
+        return error_msg
+
+
+@mcp.tool()
+@profile_tool
+async def cancel_event_occurrence(
+    event_uid: str,
+    occurrence_date: str,
+    occurrence_time: str,
+    ctx: Context = None
+) -> str:
+    """
+    Отменить одно повторение серии, оставив остальные повторения без изменений.
+
+    Args:
+        event_uid (str): Уникальный идентификатор серии (uid).
+        occurrence_date (str): Дата отменяемого повторения в формате ДД.ММ.ГГГГ.
+        occurrence_time (str): Исходное время начала повторения в формате ЧЧ:ММ.
+        ctx (Context): Контекст MCP, предоставляемый автоматически.
+
+    Returns:
+        str: Сообщение о результате отмены.
+    """
+    if ctx:
+        await ctx.info(f"Попытка отмены повторения {occurrence_date} {occurrence_time} события {event_uid}")
+
+    if not await calendar_event.ensure_connected():
+        error_msg = "Ошибка: не удалось подключиться к Яндекс Календарю. Проверьте учетные данные."
+        if ctx:
+            await ctx.error(error_msg)
+        return error_msg
+
+    try:
+        try:
+            occurrence_start = parse_date_time(occurrence_date, occurrence_time)
+        except ValueError as e:
+            error_msg = f"Ошибка формата даты или времени: {str(e)}. {DATE_TIME_FORMAT_ERROR}"
+            if ctx:
+                await ctx.error(error_msg)
+            return error_msg
+
+        result = await calendar_event.cancel_occurrence(event_uid, occurrence_start)
+
+        if ctx:
+            if "успешно" in result:
+                await ctx.info(result)
+            else:
+                await ctx.error(result)
+
+        return result
+
+    except Exception as e:
+        error_msg = f"Ошибка при отмене повторения: {str(e)}"
+        if ctx:
+            await ctx.error(error_msg)
+        return error_msg
+
+
+@mcp.tool()
+@profile_tool
+async def modify_event_occurrence(
+    event_uid: str,
+    occurrence_date: str,
+    occurrence_time: str,
+    new_date: str = "",
+    new_time: str = "",
+    duration_minutes: int = 0,
+    title: str = "",
+    description: str = "",
+    ctx: Context = None
+) -> str:
+    """
+    Изменить одно повторение серии (перенести, переименовать), не меняя остальные.
+
+    Args:
+        event_uid (str): Уникальный идентификатор серии (uid).
+        occurrence_date (str): Дата изменяемого повторения в формате ДД.ММ.ГГГГ.
+        occurrence_time (str): Исходное время начала повторения в формате ЧЧ:ММ.
+        new_date (str): Новая дата в формате ДД.ММ.ГГГГ. По умолчанию: без изменений.
+        new_time (str): Новое время в формате ЧЧ:ММ. По умолчанию: без изменений.
+        duration_minutes (int): Новая продолжительность в минутах. По умолчанию: 0 (как у серии).
+        title (str): Новое название. По умолчанию: без изменений.
+        description (str): Новое описание. По умолчанию: без изменений.
+        ctx (Context): Контекст MCP, предоставляемый автоматически.
+
+    Returns:
+        str: Сообщение о результате изменения.
+    """
+    if ctx:
+        await ctx.info(f"Попытка изменения повторения {occurrence_date} {occurrence_time} события {event_uid}")
+
+    if not await calendar_event.ensure_connected():
+        error_msg = "Ошибка: не удалось подключиться к Яндекс Календарю. Проверьте учетные данные."
+        if ctx:
+            await ctx.error(error_msg)
+        return error_msg
+
+    try:
+        try:
+            occurrence_start = parse_date_time(occurrence_date, occurrence_time)
+            start = parse_date_time(new_date or occurrence_date, new_time or occurrence_time)
+            end = start + datetime.timedelta(minutes=duration_minutes) if duration_minutes else None
+        except ValueError as e:
+            error_msg = f"Ошибка формата даты или времени: {str(e)}. {DATE_TIME_FORMAT_ERROR}"
+            if ctx:
+                await ctx.error(error_msg)
+            return error_msg
+
+        result = await calendar_event.modify_occurrence(
+            event_uid, occurrence_start, start=start, end=end,
+            title=title or None, description=description or None
+        )
+
+        if ctx:
+            if "успешно" in result:
+                await ctx.info(result)
+            else:
+                await ctx.error(result)
+
+        return result
+
+    except Exception as e:
+        error_msg = f"Ошибка при изменении повторения: {str(e)}"
+        if ctx:
+            await ctx.error(error_msg)
+        return error_msg
+
+@mcp.tool()
+@profile_tool
+async def get_free_busy(
+    attendees: str,
+    start_date: str,
+    end_date: str,
+    duration_minutes: int = 60,
+    work_start: str = "09:00",
+    work_end: str = "19:00",
+    ctx: Context = None
+) -> str:
+    """
+    Узнать занятость нескольких участников и найти общее свободное время для встречи.
+
+    Занятость всех участников запрашивается одним запросом и кэшируется на несколько
+    минут, поэтому повторные вызовы при подборе времени не нагружают сервер.
+    Участники, чью занятость узнать не удалось (статус не 2.x), не считаются
+    свободными: общие окна подбираются только по остальным участникам (если таких
+    нет, окон нет), а сами они перечислены в "unresolved".
+
+    Args:
+        attendees (str): Email участников через запятую.
+        start_date (str): Первый день периода в формате ДД.ММ.ГГГГ.
+        end_date (str): Последний день периода в формате ДД.ММ.ГГГГ.
+        duration_minutes (int): Длительность встречи для поиска общих окон. По умолчанию: 60.
+        work_start (str): Начало рабочего дня в формате ЧЧ:ММ. По умолчанию: "09:00".
+        work_end (str): Конец рабочего дня в формате ЧЧ:ММ. По умолчанию: "19:00".
+        ctx (Context): Контекст MCP, предоставляемый автоматически.
+
+    Returns:
+        str: JSON с занятыми интервалами каждого участника, общими свободными окнами
+             и участниками, для которых окна не проверены.
+    """
+    if ctx:
+        await ctx.info(f"Запрос занятости участников: {attendees} с {start_date} по {end_date}")
+
+    if not await calendar_event.ensure_connected():
+        error_msg = "Ошибка: не удалось подключиться к Яндекс Календарю. Проверьте учетные данные."
+        if ctx:
+            await ctx.error(error_msg)
+        return error_msg
+
+    try:
+        try:
+            start = parse_date_time(start_date, "00:00")
+            end = parse_date_time(end_date, "00:00") + datetime.timedelta(days=1)
+            day_start = datetime.datetime.strptime(work_start, "%H:%M").time()
+            day_end = datetime.datetime.strptime(work_end, "%H:%M").time()
+        except ValueError as e:
+            error_msg = f"Ошибка формата даты или времени: {str(e)}. {DATE_TIME_FORMAT_ERROR}"
+            if ctx:
+                await ctx.error(error_msg)
+            return error_msg
+
+        availability = await calendar_event.get_free_busy(attendees.split(','), start, end)
+
+        # Пустой список занятости при ошибке запроса не означает, что участник свободен
+        unresolved = [attendee for attendee, info in availability.items() if not info["status"].startswith("2.")]
+        all_busy = [period for attendee, info in availability.items() if attendee not in unresolved
+                    for period in info["busy"]]
+        free_slots = calendar_event.find_common_free_slots(
+            all_busy, start, end, datetime.timedelta(minutes=duration_minutes), day_start, day_end
+        ) if len(unresolved) < len(availability) else []
+
+        display_format = '%d.%m.%Y %H:%M'
+        return json.dumps({
+            "attendees": {
+                attendee: {
+                    "status": info["status"],
+                    "busy": [{"start": b_start.strftime(display_format), "end": b_end.strftime(display_format)}
+                             for b_start, b_end in info["busy"]]
+                }
+                for attendee, info in availability.items()
+            },
+            "free_slots": [{"start": f_start.strftime(display_format), "end": f_end.strftime(display_format)}
+                           for f_start, f_end in free_slots],
+            "unresolved": unresolved
+        }, ensure_ascii=False, indent=2)
+
+    except Exception as e:
+        error_msg = f"Ошибка при запросе занятости: {str(e)}"
+        if ctx:
+            await ctx.error(error_msg)
+        return error_msg
+
+@mcp.tool()
+@profile_tool
+async def import_ics_file(path: str, concurrency: int = 4, ctx: Context = None) -> str:
+    """
+    Импортировать события из файла .ics в Яндекс Календарь.
+
+    Файл читается потоково, поэтому подходит для переноса тысяч событий
+    из другого календаря. Уже существующие события (с тем же UID) пропускаются,
+    так что повторный импорт безопасен.
+
+    Args:
+        path (str): Путь к файлу .ics на компьютере, где запущен сервер.
+        concurrency (int): Количество одновременных запросов к календарю. По умолчанию: 4.
+                    Не больше общего предела сервера (YANDEX_CALDAV_MAX_CONCURRENCY).
+        ctx (Context): Контекст MCP, предоставляемый автоматически.
+
+    Returns:
+        str: JSON с количеством созданных, дополненных, пропущенных и неудачных событий.
+    """
+    if ctx:
+        await ctx.info(f"Импорт событий из файла {path}")
+
+    if not await calendar_event.ensure_connected():
+        error_msg = "Ошибка: не удалось подключиться к Яндекс Календарю. Проверьте учетные данные."
+        if ctx:
+            await ctx.error(error_msg)
+        return error_msg
+
+    try:
+        report = await import_ics(calendar_event, path, concurrency)
+        if ctx:
+            await ctx.info(f"Импорт завершен: создано {report['created']}, дополнено {report['updated']}, "
+                           f"пропущено {report['skipped']}, ошибок {report['failed']}")
+        return json.dumps(report, ensure_ascii=False, indent=2)
+
+    except Exception as e:
+        error_msg = f"Ошибка при импорте событий: {str(e)}"
+        if ctx:
+            await ctx.error(error_msg)
+        return error_msg
+
+
+@mcp.tool()
+@profile_tool
+async def export_ics_file(path: str, start_date: str, end_date: str, ctx: Context = None) -> str:
+    """
+    Экспортировать события Яндекс Календаря за период в файл .ics.
+
+    Args:
+        path (str): Путь к создаваемому файлу .ics на компьютере, где запущен сервер.
+        start_date (str): Первый день периода в формате ДД.ММ.ГГГГ.
+        end_date (str): Последний день периода в формате ДД.ММ.ГГГГ.
+        ctx (Context): Контекст MCP, предоставляемый автоматически.
+
+    Returns:
+        str: JSON с количеством экспортированных событий и путем к файлу.
+    """
+    if ctx:
+        await ctx.info(f"Экспорт событий с {start_date} по {end_date} в файл {path}")
+
+    if not await calendar_event.ensure_connected():
+        error_msg = "Ошибка: не удалось подключиться к Яндекс Календарю. Проверьте учетные данные."
+        if ctx:
+            await ctx.error(error_msg)
+        return error_msg
+
+    try:
+        try:
+            start = parse_date_time(start_date, "00:00")
+            end = parse_date_time(end_date, "00:00") + datetime.timedelta(days=1)
+        except ValueError as e:
+            error_msg = f"Ошибка формата даты: {str(e)}. {DATE_TIME_FORMAT_ERROR}"
+            if ctx:
+                await ctx.error(error_msg)
+            return error_msg
+
+        report = await export_ics(calendar_event, path, start, end)
+        return json.dumps(report, ensure_ascii=False, indent=2)
+
+    except Exception as e:
+        error_msg = f"Ошибка при экспорте событий: {str(e)}"
+        if ctx:
+            await ctx.error(error_msg)
+        return error_msg
+
+@mcp.tool()
+@profile_tool
+async def calendar_stats(
+    start_date: str = "",
+    end_date: str = "",
+    days: int = 90,
+    group_by: str = "week",
+    ctx: Context = None
+) -> str:
+    """
+    Получить сводную статистику занятости вместо полного списка событий.
+
+    Подходит для вопросов вида "сколько часов встреч у меня в неделю в этом квартале":
+    считает количество встреч, занятые часы по дням или неделям, среднюю
+    длительность и распределение по категориям и местам. Каждое повторение
+    серии считается отдельной встречей, события на весь день и отмеченные
+    как "свободен" в занятые часы не входят.
+
+    Args:
+        start_date (str): Первый день периода в формате ДД.ММ.ГГГГ. По умолчанию: сегодня.
+        end_date (str): Последний день периода в формате ДД.ММ.ГГГГ.
+                    По умолчанию: start_date + days.
+        days (int): Длина периода в днях, если end_date не указан. По умолчанию: 90.
+        group_by (str): Группировка: "day" или "week". По умолчанию: "week".
+        ctx (Context): Контекст MCP, предоставляемый автоматически.
+
+    Returns:
+        str: JSON со сводной статистикой или сообщение об ошибке.
+    """
+    if ctx:
+        await ctx.info(f"Расчет статистики календаря ({start_date or 'сегодня'} - {end_date or f'{days} дней'})")
+
+    if not await calendar_event.ensure_connected():
+        error_msg = "Ошибка: не удалось подключиться к Яндекс Календарю. Проверьте учетные данные."
+        if ctx:
+            await ctx.error(error_msg)
+        return error_msg
+
+    try:
+        try:
+            if start_date:
+                start = parse_date_time(start_date, "00:00")
+            else:
+                start = datetime.datetime.combine(datetime.date.today(), datetime.time())
+            if end_date:
+                end = parse_date_time(end_date, "00:00") + datetime.timedelta(days=1)
+            else:
+                end = start + datetime.timedelta(days=days)
+        except ValueError as e:
+            error_msg = f"Ошибка формата даты: {str(e)}. {DATE_TIME_FORMAT_ERROR}"
+            if ctx:
+                await ctx.error(error_msg)
+            return error_msg
+
+        events = await calendar_event.get_events(start, end)
+        stats = compute_calendar_stats(events, start, end, group_by)
+        return json.dumps(stats, ensure_ascii=False, indent=2)
+
+    except Exception as e:
+        error_msg = f"Ошибка при расчете статистики: {str(e)}"
+        if ctx:
+            await ctx.error(error_msg)
+        return error_msg
+
+@mcp.tool()
+@profile_tool
+async def get_write_queue_status(clear_finished: bool = False, ctx: Context = None) -> str:
+    """
+    Получить состояние очереди фоновой записи в Яндекс Календарь.
+
+    Показывает, сколько созданий и удалений еще не отправлено в календарь,
+    и какие операции завершились конфликтом, ошибкой или не нашли событие для удаления.
+
+    Args:
+        clear_finished (bool): Убрать из очереди операции с конфликтом, ошибкой
+                    или не найденным событием после вывода. По умолчанию: False.
+        ctx (Context): Контекст MCP, предоставляемый автоматически.
+
+    Returns:
+        str: JSON с состоянием очереди или сообщение о том, что очередь не включена.
+    """
+    if not calendar_event.write_queue:
+        return "Очередь записи не включена (задайте YANDEX_WRITE_QUEUE_FILE)"
+
+    try:
+        calendar_event.write_queue.ensure_running()
+        status = calendar_event.write_queue.status(clear_finished)
+        return json.dumps(status, ensure_ascii=False, indent=2)
+
+    except Exception as e:
+        error_msg = f"Ошибка при получении состояния очереди: {str(e)}"
+        if ctx:
+            await ctx.error(error_msg)
+        return error_msg
+
 if __name__ == "__main__":
-    mcp.run(transport='stdio')
+    mcp.run(transport=MCP_TRANSPORT)
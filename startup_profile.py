@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+Профиль запуска MCP-сервера Яндекс Календаря
+
+Клиент (например, Claude Desktop) запускает сервер заново на каждую сессию,
+поэтому время от запуска процесса до ответа на рукопожатие MCP заметно
+пользователю. Скрипт запускает импорт main.py в отдельном процессе
+с `python -X importtime` и показывает:
+
+1. Общее время импорта и пиковое потребление памяти (RSS)
+2. Самые тяжелые прямые импорты main.py
+3. Разбивку собственного времени импорта по пакетам
+
+Подключение к календарю при импорте не выполняется (оно откладывается
+до первого вызова инструмента), поэтому учетные данные не нужны.
+
+Запуск:
+    python startup_profile.py
+    python startup_profile.py --top 20 --first-use
+
+Автор: Alexander Gorlov
+Лицензия: MIT
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+from collections import Counter
+from typing import List, Dict, Any, Tuple
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Код, который выполняется в дочернем процессе. Пиковый RSS печатается в stdout,
+# отчет importtime идет в stderr
+CHILD_CODE = """
+import sys
+{imports}
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдает килобайты, macOS - байты
+    print(rss // 1024 if sys.platform == 'darwin' else rss)
+except ImportError:
+    print(-1)
+"""
+
+
+def parse_importtime(output: str) -> List[Tuple[int, int, int, str]]:
+    """
+    Разобрать вывод `python -X importtime`
+
+    Returns:
+        List[Tuple[int, int, int, str]]: (собственное время мкс, накопленное время мкс, глубина, модуль)
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+
+def profile_startup(first_use: bool = False) -> Dict[str, Any]:
+    """
+    Запустить импорт main.py в отдельном процессе и собрать профиль
+
+    Args:
+        first_use (bool): Дополнительно импортировать зависимости, которые
+            загружаются только при первом вызове инструмента (caldav)
+
+    Returns:
+        Dict[str, Any]: Время процесса, RSS и строки importtime
+    """
+    imports = "import main"
+    if first_use:
+        imports += "\nimport caldav"
+    started = time.perf_counter()
+    child = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD_CODE.format(imports=imports)],
+        cwd=PROJECT_DIR, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - started
+    if child.returncode != 0:
+        raise RuntimeError(child.stderr.strip().splitlines()[-1] if child.stderr.strip() else "ошибка запуска")
+    rss_kb = int(child.stdout.strip().splitlines()[-1])
+    return {"wall_seconds": wall, "rss_kb": rss_kb, "rows": parse_importtime(child.stderr)}
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Профиль запуска MCP-сервера: время импорта и память")
+    parser.add_argument("--top", type=int, default=15, help="Сколько строк показывать (по умолчанию: 15)")
+    parser.add_argument("--first-use", action="store_true",
+                        help="Учесть зависимости, загружаемые при первом вызове инструмента")
+    args = parser.parse_args(argv)
+
+    try:
+        profile = profile_startup(args.first_use)
+    except RuntimeError as e:
+        print(f"Ошибка: не удалось импортировать main.py: {str(e)}", file=sys.stderr)
+        return 1
+
+    rows = profile["rows"]
+    top_level = [row for row in rows if row[2] == 0]
+    total_us = sum(row[1] for row in top_level)
+
+    # importtime печатает вложенные импорты перед родителем
+    main_imports = []
+    children = []
+    for row in rows:
+        if row[2] == 0:
+            if row[3] == "main":
+                main_imports = children
+            children = []
+        elif row[2] == 1:
+            children.append(row)
+
+    by_package: Counter = Counter()
+    for self_us, _, _, name in rows:
+        by_package[name.split('.')[0]] += self_us
+
+    print(f"Время процесса (запуск интерпретатора + импорт): {profile['wall_seconds'] * 1000:.0f} мс")
+    print(f"Суммарное время импорта: {total_us / 1000:.0f} мс, модулей: {len(rows)}")
+    if profile["rss_kb"] >= 0:
+        print(f"Пиковая память (RSS): {profile['rss_kb'] / 1024:.1f} МБ")
+    else:
+        print("Пиковая память (RSS): недоступно на этой платформе")
+
+    print("\nПрямые импорты main.py (накопленное время):")
+    for _, cumulative_us, _, name in sorted(main_imports, key=lambda row: -row[1])[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} мс  {name}")
+
+    print("\nСобственное время импорта по пакетам:")
+    for package, self_us in by_package.most_common(args.top):
+        print(f"  {self_us / 1000:8.1f} мс  {package}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,20 @@
 - show_events.py: Просмотр событий на следующую неделю
 - test_create_event.py: Тест создания одного события
 - test_json_events.py: Получение событий в JSON и опция удаления
+- load_test.py: Нагрузочный тест MCP-сервера по stdio или HTTP (пропускная способность, перцентили)
+- caldav_stub.py: Локальный CalDAV-сервер в памяти для нагрузочного теста и тестов поведения
+- test_day_index.py: Индекс событий по дням, включая повторения серии
+- test_ics_transfer.py: Импорт и экспорт .ics, серии и переопределения
+- test_calendar_stats.py: Сводная статистика занятости
+- test_write_queue.py: Фоновая отправка очереди записи
+- test_recurrence.py: Правила повторения, отмена и изменение повторений серии
+- test_concurrency.py: Предел одновременных запросов и объединение одинаковых запросов
+- test_free_busy.py: Занятость участников, кэш и общие свободные окна
+- test_idempotency.py: Создание событий с ключом идемпотентности
+
+Тесты test_day_index.py и другие тесты поведения работают с локальной
+CalDAV-заглушкой (фикстура stub_calendar в conftest.py), учетные данные не нужны:
+  python -m pytest tests
 
 Для запуска всех тестов используйте скрипт run_tests.py в корневой директории:
   python run_tests.py
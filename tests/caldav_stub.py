@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+Локальный CalDAV-сервер для нагрузочного тестирования
+
+Минимальная замена caldav.yandex.ru, хранящая события в памяти. Поддерживает
+ровно то, что использует YandexCalendarEvents:
+
+1. Поиск principal и календаря (PROPFIND)
+2. Поиск событий за период и по UID (REPORT calendar-query)
+3. Условные PUT (If-None-Match / If-Match), GET и DELETE объектов с ETag
+4. Запрос занятости участников (POST VFREEBUSY в schedule-outbox): занятость
+   задается в CalendarStore.freebusy, неизвестные участники получают 3.7
+
+Повторяющиеся события не разворачиваются, а время ответа Яндекса можно
+имитировать задержкой --latency-ms. Учетные данные не проверяются.
+
+Запуск:
+    python tests/caldav_stub.py --port 5233 --latency-ms 30
+
+Затем в .env или окружении сервера:
+    YANDEX_CALDAV_URL=http://127.0.0.1:5233/
+    YANDEX_USERNAME=load
+    YANDEX_PASSWORD=load
+
+Автор: Alexander Gorlov
+Лицензия: MIT
+"""
+
+import re
+import sys
+import time
+import uuid
+import argparse
+import datetime
+import threading
+from urllib.parse import quote, unquote
+from xml.sax.saxutils import escape
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Optional, Tuple
+
+PRINCIPAL_PATH = "/principal/"
+HOME_PATH = "/calendars/"
+CALENDAR_PATH = "/calendars/main/"
+OUTBOX_PATH = "/outbox/"
+
+MULTISTATUS = ('<?xml version="1.0" encoding="utf-8"?>\n'
+               '<d:multistatus xmlns:d="DAV:" xmlns:c="urn:ietf:params:xml:ns:caldav" '
+               'xmlns:cs="http://calendarserver.org/ns/">{}</d:multistatus>')
+
+
+def _response(href: str, props: str) -> str:
+    return (f"<d:response><d:href>{escape(quote(href))}</d:href><d:propstat><d:prop>{props}</d:prop>"
+            f"<d:status>HTTP/1.1 200 OK</d:status></d:propstat></d:response>")
+
+
+def _ical_time(ical: str, name: str) -> Optional[datetime.datetime]:
+    """Значение DTSTART/DTEND без учета часового пояса (достаточно для выборки за период)"""
+    match = re.search(rf'^{name}[;:][^\r\n]*?(\d{{8}})(?:T(\d{{6}}))?', ical, re.MULTILINE)
+    if not match:
+        return None
+    return datetime.datetime.strptime(match.group(1) + (match.group(2) or "000000"), '%Y%m%d%H%M%S')
+
+
+class CalendarStore:
+    """Объекты календаря в памяти: путь -> (iCal, ETag)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.objects: Dict[str, Tuple[str, str]] = {}
+        self.ctag = 0
+        # email -> строки FREEBUSY участника (например, "FREEBUSY:20250101T090000Z/PT1H")
+        self.freebusy: Dict[str, List[str]] = {}
+        self.freebusy_requests = 0
+
+    def put(self, path: str, ical: str, if_match: Optional[str], if_none_match: Optional[str]) -> Tuple[int, str]:
+        with self.lock:
+            current = self.objects.get(path)
+            if if_none_match == "*" and current:
+                return 412, ""
+            if if_match and (not current or current[1] != if_match):
+                return 412, ""
+            etag = f'"{uuid.uuid4().hex}"'
+            self.objects[path] = (ical, etag)
+            self.ctag += 1
+            return (204 if current else 201), etag
+
+    def delete(self, path: str, if_match: Optional[str]) -> int:
+        with self.lock:
+            current = self.objects.get(path)
+            if not current:
+                return 404
+            if if_match and current[1] != if_match:
+                return 412
+            del self.objects[path]
+            self.ctag += 1
+            return 204
+
+    def query(self, start: Optional[datetime.datetime], end: Optional[datetime.datetime],
+              uid: Optional[str]) -> Dict[str, Tuple[str, str]]:
+        with self.lock:
+            items = dict(self.objects)
+        result = {}
+        for path, (ical, etag) in items.items():
+            if uid is not None and not re.search(rf'^UID:{re.escape(uid)}\r?$', ical, re.MULTILINE):
+                continue
+            event_start = _ical_time(ical, "DTSTART")
+            event_end = _ical_time(ical, "DTEND") or event_start
+            # Серия с RRULE может иметь повторения в периоде, даже если началась раньше
+            recurring = re.search(r'^RRULE[;:]', ical, re.MULTILINE) is not None
+            if start and event_end and event_end <= start and event_start < start and not recurring:
+                continue
+            if end and event_start and event_start >= end:
+                continue
+            result[path] = (ical, etag)
+        return result
+
+
+class CalDAVStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    store: CalendarStore = None
+    latency = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def object_path(self) -> str:
+        """Путь без URL-кодирования: клиент может закодировать "@" в UID как %40"""
+        return unquote(self.path.split("?", 1)[0])
+
+    def _body(self) -> str:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length).decode("utf-8") if length else ""
+
+    def _send(self, status: int, body: str = "", content_type: str = "application/xml; charset=utf-8",
+              headers: Dict[str, str] = None):
+        if self.latency:
+            time.sleep(self.latency)
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _collection_props(self, path: str) -> str:
+        props = (f"<d:current-user-principal><d:href>{PRINCIPAL_PATH}</d:href></d:current-user-principal>"
+                 f"<c:calendar-home-set><d:href>{HOME_PATH}</d:href></c:calendar-home-set>"
+                 f"<c:schedule-outbox-URL><d:href>{OUTBOX_PATH}</d:href></c:schedule-outbox-URL>")
+        if path == CALENDAR_PATH:
+            return props + ("<d:resourcetype><d:collection/><c:calendar/></d:resourcetype>"
+                            "<d:displayname>main</d:displayname>"
+                            "<c:supported-calendar-component-set><c:comp name=\"VEVENT\"/>"
+                            "</c:supported-calendar-component-set>"
+                            f"<cs:getctag>{self.store.ctag}</cs:getctag>")
+        if path == PRINCIPAL_PATH:
+            return props + "<d:resourcetype><d:principal/></d:resourcetype>"
+        return props + "<d:resourcetype><d:collection/></d:resourcetype>"
+
+    def do_OPTIONS(self):
+        self._send(200, headers={"DAV": "1, 2, 3, calendar-access",
+                                 "Allow": "OPTIONS, GET, PUT, POST, DELETE, PROPFIND, REPORT"})
+
+    def do_PROPFIND(self):
+        self._body()
+        path = self.object_path.rstrip("/") + "/"
+        responses = [_response(path, self._collection_props(path))]
+        if self.headers.get("Depth") == "1":
+            if path == HOME_PATH:
+                responses.append(_response(CALENDAR_PATH, self._collection_props(CALENDAR_PATH)))
+            elif path == CALENDAR_PATH:
+                for href, (_, etag) in self.store.query(None, None, None).items():
+                    responses.append(_response(href, f"<d:getetag>{escape(etag)}</d:getetag>"
+                                                     "<d:resourcetype/>"))
+        self._send(207, MULTISTATUS.format("".join(responses)))
+
+    def do_REPORT(self):
+        body = self._body()
+        time_range = re.search(r'time-range[^>]*?start="(\d{8}T\d{6})Z?"[^>]*?end="(\d{8}T\d{6})Z?"', body)
+        start = end = None
+        if time_range:
+            start, end = (datetime.datetime.strptime(value, '%Y%m%dT%H%M%S') for value in time_range.groups())
+        uid_match = re.search(r'<[^>]*text-match[^>]*>([^<]+)</', body)
+        if "calendar-multiget" in body:
+            hrefs = {unquote(href) for href in re.findall(r'<[^>]*href>([^<]+)</', body)}
+            objects = {path: item for path, item in self.store.query(None, None, None).items() if path in hrefs}
+        else:
+            objects = self.store.query(start, end, uid_match.group(1) if uid_match else None)
+        responses = [
+            _response(path, f"<d:getetag>{escape(etag)}</d:getetag>"
+                            f"<c:calendar-data>{escape(ical)}</c:calendar-data>")
+            for path, (ical, etag) in objects.items()
+        ]
+        self._send(207, MULTISTATUS.format("".join(responses)))
+
+    def do_GET(self):
+        item = self.store.query(None, None, None).get(self.object_path)
+        if not item:
+            self._send(404, "Not Found", "text/plain")
+            return
+        self._send(200, item[0], "text/calendar; charset=utf-8", {"ETag": item[1]})
+
+    def do_PUT(self):
+        body = self._body()
+        status, etag = self.store.put(self.object_path, body, self.headers.get("If-Match"),
+                                      self.headers.get("If-None-Match"))
+        self._send(status, headers={"ETag": etag} if etag else None)
+
+    def do_POST(self):
+        body = self._body()
+        if self.object_path != OUTBOX_PATH:
+            self._send(405, "Method Not Allowed", "text/plain")
+            return
+        self.store.freebusy_requests += 1
+        responses = []
+        for email in re.findall(r'^ATTENDEE[^:\r\n]*:mailto:([^\r\n]+)', body, re.MULTILINE | re.IGNORECASE):
+            lines = self.store.freebusy.get(email.lower())
+            if lines is None:
+                status, data = "3.7;Invalid calendar user", ""
+            else:
+                status = "2.0;Success"
+                data = "\r\n".join(["BEGIN:VCALENDAR", "VERSION:2.0", "METHOD:REPLY", "BEGIN:VFREEBUSY",
+                                     f"ATTENDEE:mailto:{email}"] + lines + ["END:VFREEBUSY", "END:VCALENDAR", ""])
+            responses.append(f"<c:response><c:recipient><d:href>mailto:{escape(email)}</d:href></c:recipient>"
+                             f"<c:request-status>{status}</c:request-status>"
+                             f"<c:calendar-data>{escape(data)}</c:calendar-data></c:response>")
+        self._send(200, '<?xml version="1.0" encoding="utf-8"?>\n'
+                        '<c:schedule-response xmlns:d="DAV:" xmlns:c="urn:ietf:params:xml:ns:caldav">'
+                        f'{"".join(responses)}</c:schedule-response>')
+
+    def do_DELETE(self):
+        self._body()
+        self._send(self.store.delete(self.object_path, self.headers.get("If-Match")))
+
+
+def start_stub(port: int = 0, latency_ms: float = 0.0) -> ThreadingHTTPServer:
+    """
+    Запустить CalDAV-заглушку в фоновом потоке
+
+    Args:
+        port (int): Порт (0 - любой свободный, см. server.server_address)
+        latency_ms (float): Задержка каждого ответа, имитирующая сеть
+
+    Returns:
+        ThreadingHTTPServer: Запущенный сервер (остановить: server.shutdown())
+    """
+    handler = type("Handler", (CalDAVStubHandler,), {"store": CalendarStore(), "latency": latency_ms / 1000})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="caldav-stub", daemon=True).start()
+    return server
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Локальный CalDAV-сервер в памяти для нагрузочных тестов")
+    parser.add_argument("--port", type=int, default=5233, help="Порт (по умолчанию: 5233)")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="Задержка каждого ответа в мс, имитирующая сеть (по умолчанию: 0)")
+    args = parser.parse_args(argv)
+
+    server = start_stub(args.port, args.latency_ms)
+    print(f"CalDAV-заглушка: http://127.0.0.1:{server.server_address[1]}/ (Ctrl+C для остановки)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
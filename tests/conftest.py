@@ -0,0 +1,31 @@
+"""
+Общие фикстуры тестов: календарь на локальной CalDAV-заглушке (caldav_stub.py)
+
+Тесты с этой фикстурой не обращаются к Яндексу и не требуют учетных данных.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Добавляем корневую директорию проекта и директорию тестов в путь поиска модулей
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from caldav_stub import start_stub
+from yandex_calendar_events2 import YandexCalendarEvents
+
+
+@pytest.fixture
+def stub_server():
+    """Запущенная CalDAV-заглушка (данные: stub_server.RequestHandlerClass.store)"""
+    server = start_stub()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def stub_calendar(stub_server):
+    """YandexCalendarEvents, подключенный к пустому календарю в памяти"""
+    return YandexCalendarEvents(f"http://127.0.0.1:{stub_server.server_address[1]}/", "test", "test")
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+Нагрузочный тест MCP-сервера Яндекс Календаря
+
+Запускает main.py как настоящий MCP-сервер и вызывает его инструменты
+через клиент MCP, поэтому измеряется весь путь вызова: транспорт,
+диспетчеризация FastMCP, YandexCalendarEvents и CalDAV.
+
+1. Поднимает локальную CalDAV-заглушку (tests/caldav_stub.py) с задержкой,
+   имитирующей сеть, или использует указанный --caldav-url
+2. Запускает сервер по stdio или streamable HTTP
+3. Выполняет заданное число вызовов смеси get/create/delete
+   с заданным числом одновременных вызовов
+4. Печатает пропускную способность и перцентили задержек по операциям,
+   а с --max-p95-ms завершается с кодом 1 при превышении порога
+
+Удаляются только события, созданные этим тестом. Для профилирования
+сервера под нагрузкой добавьте --profile sampling (см. tool_profiler.py):
+профили сохраняются во временный каталог или в --profile-dir.
+
+Запуск:
+    python tests/load_test.py
+    python tests/load_test.py --transport http --calls 500 --concurrency 16 \\
+        --mix get=60,create=25,delete=15 --latency-ms 40 --max-p95-ms 500
+
+Автор: Alexander Gorlov
+Лицензия: MIT
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import socket
+import random
+import asyncio
+import argparse
+import datetime
+import tempfile
+import subprocess
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Tuple
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+# Добавляем директорию тестов в путь поиска модулей (для caldav_stub)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from caldav_stub import start_stub
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+OPERATIONS = ("get", "create", "delete")
+UID_PATTERN = re.compile(r'UID: ([^)\s]+)')
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    """Разобрать смесь операций вида "get=70,create=20,delete=10" """
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Неизвестная операция: {name}. Допустимо: {', '.join(OPERATIONS)}")
+        weights[name] = int(weight)
+    if sum(weights.values()) <= 0:
+        raise ValueError("Сумма весов операций должна быть больше нуля")
+    return weights
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Перцентиль по ближайшему рангу"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _server_env(args, caldav_url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "YANDEX_CALDAV_URL": caldav_url,
+        "YANDEX_USERNAME": args.username,
+        "YANDEX_PASSWORD": args.password,
+    })
+    if args.profile:
+        env["YANDEX_MCP_PROFILE"] = args.profile
+        env["YANDEX_MCP_PROFILE_DIR"] = args.profile_dir
+    return env
+
+
+@asynccontextmanager
+async def open_session(args, caldav_url: str):
+    """Запустить сервер с выбранным транспортом и открыть сессию MCP"""
+    env = _server_env(args, caldav_url)
+    # Журнал FastMCP пишет строку на каждый запрос, без --verbose он скрыт
+    if args.transport == "stdio":
+        params = StdioServerParameters(command=sys.executable, args=[os.path.join(PROJECT_DIR, "main.py")],
+                                       env=env, cwd=PROJECT_DIR)
+        with open(os.devnull, 'w') as devnull:
+            async with stdio_client(params, errlog=sys.stderr if args.verbose else devnull) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    yield session
+        return
+
+    port = _free_port()
+    env.update({"YANDEX_MCP_TRANSPORT": "streamable-http", "YANDEX_MCP_HOST": "127.0.0.1",
+                "YANDEX_MCP_PORT": str(port)})
+    server = subprocess.Popen([sys.executable, os.path.join(PROJECT_DIR, "main.py")], cwd=PROJECT_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=None if args.verbose else subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("HTTP-сервер MCP не запустился")
+                await asyncio.sleep(0.1)
+        async with streamablehttp_client(f"http://127.0.0.1:{port}/mcp") as (read, write, _):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                yield session
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+class LoadTest:
+    def __init__(self, session: ClientSession, args):
+        self.session = session
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.weights = parse_mix(args.mix)
+        # UID событий, созданных тестом и еще не удаленных
+        self.created: List[str] = []
+        self.latencies: Dict[str, List[float]] = {name: [] for name in OPERATIONS}
+        self.errors: Dict[str, int] = {name: 0 for name in OPERATIONS}
+        self.remaining = args.calls
+
+    def _event_time(self) -> Tuple[str, str]:
+        start = datetime.datetime.now() + datetime.timedelta(days=self.random.randint(1, 7),
+                                                             hours=self.random.randint(0, 8))
+        return start.strftime('%d.%m.%Y'), start.strftime('%H:00')
+
+    async def _call(self, operation: str) -> None:
+        if operation == "delete" and not self.created:
+            # Удалять пока нечего - создаем событие, чтобы сохранить долю записей
+            operation = "create"
+
+        if operation == "get":
+            today = datetime.date.today()
+            arguments = {"start_date": today.strftime('%d.%m.%Y'),
+                         "end_date": (today + datetime.timedelta(days=self.args.get_days - 1)).strftime('%d.%m.%Y')}
+            tool = "get_upcoming_events"
+        elif operation == "create":
+            date, start_time = self._event_time()
+            arguments = {"title": f"Нагрузочный тест {self.args.calls - self.remaining}",
+                         "start_date": date, "start_time": start_time, "duration_minutes": 30}
+            tool = "create_calendar_event"
+        else:
+            arguments = {"event_uid": self.created.pop(self.random.randrange(len(self.created)))}
+            tool = "delete_calendar_event"
+
+        started = time.perf_counter()
+        result = await self.session.call_tool(tool, arguments)
+        elapsed = time.perf_counter() - started
+
+        text = "".join(getattr(item, "text", "") for item in result.content)
+        self.latencies[operation].append(elapsed)
+        if result.isError or text.startswith("Ошибка"):
+            self.errors[operation] += 1
+            if self.args.verbose:
+                print(f"{tool}: {text[:200]}", file=sys.stderr)
+        elif operation == "create":
+            match = UID_PATTERN.search(text)
+            if match:
+                self.created.append(match.group(1))
+
+    async def _worker(self):
+        names = list(self.weights)
+        weights = [self.weights[name] for name in names]
+        while self.remaining > 0:
+            self.remaining -= 1
+            await self._call(self.random.choices(names, weights)[0])
+
+    async def run(self) -> float:
+        started = time.perf_counter()
+        await asyncio.gather(*(self._worker() for _ in range(self.args.concurrency)))
+        return time.perf_counter() - started
+
+    async def cleanup(self):
+        """Удалить события, созданные тестом (в статистику не входит)"""
+        for event_uid in self.created:
+            await self.session.call_tool("delete_calendar_event", {"event_uid": event_uid})
+        self.created = []
+
+    def report(self, duration: float) -> Dict[str, Any]:
+        total = sum(len(values) for values in self.latencies.values())
+        report = {
+            "transport": self.args.transport,
+            "calls": total,
+            "concurrency": self.args.concurrency,
+            "duration_seconds": round(duration, 3),
+            "throughput_per_second": round(total / duration, 1) if duration else 0,
+            "errors": sum(self.errors.values()),
+            "operations": {},
+        }
+        all_values = [value for values in self.latencies.values() for value in values]
+        for name, values in list(self.latencies.items()) + [("all", all_values)]:
+            if not values:
+                continue
+            report["operations"][name] = {
+                "calls": len(values),
+                "errors": self.errors.get(name, sum(self.errors.values())),
+                **{f"p{int(fraction * 100)}_ms": round(percentile(values, fraction) * 1000, 1)
+                   for fraction in (0.5, 0.95, 0.99)},
+                "max_ms": round(max(values) * 1000, 1),
+            }
+        return report
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"Транспорт: {report['transport']}, вызовов: {report['calls']}, "
+          f"одновременно: {report['concurrency']}, ошибок: {report['errors']}")
+    print(f"Время: {report['duration_seconds']:.2f} с, пропускная способность: "
+          f"{report['throughput_per_second']:.1f} вызовов/с")
+    print(f"\n{'операция':<10}{'вызовов':>9}{'ошибок':>8}{'p50 мс':>10}{'p95 мс':>10}{'p99 мс':>10}{'max мс':>10}")
+    for name, stats in report["operations"].items():
+        print(f"{name:<10}{stats['calls']:>9}{stats['errors']:>8}{stats['p50_ms']:>10.1f}"
+              f"{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}")
+
+
+async def run(args) -> int:
+    stub = None
+    caldav_url = args.caldav_url
+    if not caldav_url:
+        stub = start_stub(latency_ms=args.latency_ms)
+        caldav_url = f"http://127.0.0.1:{stub.server_address[1]}/"
+
+    try:
+        async with open_session(args, caldav_url) as session:
+            test = LoadTest(session, args)
+            if args.warmup:
+                # Первый вызов подключается к календарю, его задержку не учитываем
+                await session.call_tool("get_upcoming_events", {"days": 1})
+            duration = await test.run()
+            await test.cleanup()
+    finally:
+        if stub:
+            stub.shutdown()
+
+    report = test.report(duration)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+
+    p95 = report["operations"].get("all", {}).get("p95_ms", 0)
+    if args.max_p95_ms and p95 > args.max_p95_ms:
+        print(f"\nРегрессия: p95 {p95:.1f} мс превышает порог {args.max_p95_ms:.1f} мс", file=sys.stderr)
+        return 1
+    if report["errors"] and not args.allow_errors:
+        print(f"\nОшибок при вызовах: {report['errors']}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест MCP-сервера через stdio или HTTP")
+    parser.add_argument("--transport", choices=("stdio", "http"), default="stdio",
+                        help="Транспорт MCP (по умолчанию: stdio)")
+    parser.add_argument("--calls", type=int, default=200, help="Число вызовов (по умолчанию: 200)")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="Число одновременных вызовов (по умолчанию: 8)")
+    parser.add_argument("--mix", default="get=70,create=20,delete=10",
+                        help="Смесь операций (по умолчанию: get=70,create=20,delete=10)")
+    parser.add_argument("--get-days", type=int, default=7,
+                        help="Период запроса событий в днях, начиная с сегодня (по умолчанию: 7)")
+    parser.add_argument("--latency-ms", type=float, default=20.0,
+                        help="Задержка ответов CalDAV-заглушки в мс (по умолчанию: 20)")
+    parser.add_argument("--caldav-url", default="",
+                        help="Адрес CalDAV-сервера вместо встроенной заглушки (только тестовый календарь!)")
+    parser.add_argument("--username", default="load", help="Логин для --caldav-url")
+    parser.add_argument("--password", default="load", help="Пароль для --caldav-url")
+    parser.add_argument("--profile", choices=("cprofile", "sampling"),
+                        help="Включить профилирование вызовов на сервере (YANDEX_MCP_PROFILE)")
+    parser.add_argument("--profile-dir", default="",
+                        help="Каталог для профилей (по умолчанию: новый временный каталог)")
+    parser.add_argument("--seed", type=int, default=1, help="Зерно генератора смеси операций (по умолчанию: 1)")
+    parser.add_argument("--no-warmup", dest="warmup", action="store_false",
+                        help="Учитывать в статистике первый вызов с подключением к календарю")
+    parser.add_argument("--max-p95-ms", type=float, default=0,
+                        help="Порог p95 по всем вызовам, при превышении код возврата 1")
+    parser.add_argument("--allow-errors", action="store_true", help="Не считать ошибки вызовов провалом")
+    parser.add_argument("--json", action="store_true", help="Вывести отчет в JSON")
+    parser.add_argument("--verbose", action="store_true", help="Печатать тексты ошибок и журнал сервера")
+    args = parser.parse_args(argv)
+
+    try:
+        parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.profile:
+        # Профили не должны оставаться в рабочей копии репозитория
+        args.profile_dir = args.profile_dir or tempfile.mkdtemp(prefix="yandex-mcp-profiles-")
+        print(f"Профили сервера: {args.profile_dir}", file=sys.stderr)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Тесты сводной статистики (calendar_stats.py)
+
+1. Пересекающиеся встречи дают объединенные занятые часы
+2. События на весь день и "свободные" события не занимают время
+3. Повторения серии считаются каждое в своей неделе
+"""
+
+import asyncio
+import datetime
+
+from calendar_stats import compute_calendar_stats
+
+MONDAY = datetime.datetime(2026, 10, 5)
+
+
+def _event(start: datetime.datetime, hours: float, **fields) -> dict:
+    event = {"uid": f"{start.isoformat()}@test", "start_time": start.isoformat(),
+             "end_time": (start + datetime.timedelta(hours=hours)).isoformat()}
+    event.update(fields)
+    return event
+
+
+def test_overlapping_meetings_are_merged():
+    events = [
+        _event(MONDAY + datetime.timedelta(hours=10), 1, categories=["Работа"]),
+        _event(MONDAY + datetime.timedelta(hours=10, minutes=30), 1, location="Переговорная"),
+        _event(MONDAY + datetime.timedelta(days=8, hours=9), 2),
+    ]
+    stats = compute_calendar_stats(events, MONDAY, MONDAY + datetime.timedelta(days=14), "week")
+    assert stats["events"] == 3
+    assert stats["busy_hours"] == 3.5
+    assert stats["total_event_hours"] == 4
+    assert [(week["week"], week["events"], week["busy_hours"]) for week in stats["by_week"]] == [
+        ("05.10.2026", 2, 1.5), ("12.10.2026", 1, 2.0)]
+    assert stats["categories"] == {"Работа": 1}
+    assert stats["locations"] == {"Переговорная": 1}
+
+
+def test_all_day_and_transparent_events_are_not_busy():
+    events = [
+        _event(MONDAY, 24, all_day=True, transparency="TRANSPARENT", title="День рождения"),
+        _event(MONDAY + datetime.timedelta(days=1), 24, all_day=True, title="Отпуск"),
+        _event(MONDAY + datetime.timedelta(hours=15), 1, transparency="TRANSPARENT"),
+        _event(MONDAY + datetime.timedelta(hours=10), 1),
+    ]
+    stats = compute_calendar_stats(events, MONDAY, MONDAY + datetime.timedelta(days=7), "day")
+    assert stats["events"] == 4
+    assert stats["busy_hours"] == 1
+    assert stats["average_duration_minutes"] == 60
+
+
+def test_recurring_series_counts_every_occurrence(stub_calendar):
+    today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+    start = today + datetime.timedelta(days=1, hours=10)
+    end = today + datetime.timedelta(days=140)
+
+    async def scenario():
+        result = await stub_calendar.create_event("Планерка", start, start + datetime.timedelta(hours=1),
+                                                  rrule=stub_calendar.build_rrule("WEEKLY", count=20))
+        uid = result.split("UID: ")[1].rstrip(")")
+        await stub_calendar.cancel_occurrence(uid, start + datetime.timedelta(days=7))
+        return await stub_calendar.get_events(today, end)
+
+    stats = compute_calendar_stats(asyncio.run(scenario()), today, end, "week")
+    assert stats["events"] == 19
+    assert stats["busy_hours"] == 19
+    assert all(week["events"] == 1 for week in stats["by_week"])
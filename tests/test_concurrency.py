@@ -0,0 +1,89 @@
+"""
+Тесты ограничения и объединения запросов CalDAV (_run_caldav, _coalesce)
+
+1. Одинаковые одновременные запросы событий дают один запрос к серверу
+2. Число одновременных запросов аккаунта не превышает max_concurrency
+3. Импорт не запускает больше выгрузок, чем позволяет предел аккаунта
+"""
+
+import time
+import asyncio
+import datetime
+import threading
+
+from ics_transfer import import_ics
+from yandex_calendar_events2 import YandexCalendarEvents
+
+
+def test_identical_requests_are_coalesced(stub_calendar):
+    start = datetime.datetime.combine(datetime.date.today(), datetime.time(9))
+    calls = []
+
+    async def scenario():
+        assert await stub_calendar.ensure_connected()
+        search = stub_calendar.caldav_calendar.date_search
+
+        def counting_search(*args, **kwargs):
+            calls.append(kwargs)
+            time.sleep(0.05)
+            return search(*args, **kwargs)
+
+        stub_calendar.caldav_calendar.date_search = counting_search
+        return await asyncio.gather(*[
+            stub_calendar.get_upcoming_events(90, "json", start=start) for _ in range(8)])
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(result == {"events": [], "count": 0} for result in results)
+
+
+def test_account_limit_is_respected(stub_calendar):
+    url = stub_calendar.caldav_url
+    calendar = YandexCalendarEvents(url, "limited", "test", max_concurrency=2)
+    # Второй экземпляр того же аккаунта делит с первым тот же предел
+    assert YandexCalendarEvents(url, "limited", "test", max_concurrency=8).max_concurrency == 2
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def request():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+
+    async def scenario():
+        await asyncio.gather(*[calendar._run_caldav(request) for _ in range(6)])
+
+    asyncio.run(scenario())
+    assert max(peak) == 2
+
+
+def test_import_concurrency_is_capped_by_account_limit(stub_calendar, tmp_path):
+    calendar = YandexCalendarEvents(stub_calendar.caldav_url, "import", "test", max_concurrency=2)
+    start = datetime.datetime.combine(datetime.date.today(), datetime.time(9))
+    events = "".join(
+        f"BEGIN:VEVENT\r\nUID:event-{i}@test\r\nSUMMARY:Событие {i}\r\n"
+        f"DTSTART:{(start + datetime.timedelta(hours=i)).strftime('%Y%m%dT%H%M%S')}\r\n"
+        f"DTEND:{(start + datetime.timedelta(hours=i + 1)).strftime('%Y%m%dT%H%M%S')}\r\nEND:VEVENT\r\n"
+        for i in range(6))
+    path = tmp_path / "calendar.ics"
+    path.write_text(f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\n{events}END:VCALENDAR\r\n", encoding='utf-8')
+    active = []
+    peak = []
+    save = calendar.save_event_object
+
+    async def tracking_save(uid, ical):
+        active.append(uid)
+        peak.append(len(active))
+        try:
+            return await save(uid, ical)
+        finally:
+            active.remove(uid)
+
+    calendar.save_event_object = tracking_save
+    report = asyncio.run(import_ics(calendar, str(path), concurrency=8))
+    assert report["created"] == 6
+    assert max(peak) == 2
@@ -0,0 +1,153 @@
+"""
+Тесты индекса событий по дням (day_index.py)
+
+1. Порядок и отсутствие дублей многодневных событий
+2. Сдвиг горизонта после полуночи
+3. Повторения серии попадают в индекс каждое в свой день
+4. Неудачное удаление не убирает событие из индекса
+5. Снимок, запрошенный до создания или отмены, не затирает изменение
+"""
+
+import asyncio
+import datetime
+
+from day_index import DayIndex
+
+
+def _event(uid: str, start: datetime.datetime, hours: float = 1) -> dict:
+    return {"uid": uid, "title": uid, "start_time": start.isoformat(),
+            "end_time": (start + datetime.timedelta(hours=hours)).isoformat()}
+
+
+def _today() -> datetime.datetime:
+    return datetime.datetime.combine(datetime.date.today(), datetime.time())
+
+
+def test_query_sorted_without_duplicates():
+    today = _today()
+    index = DayIndex(horizon_days=7)
+    index.load([
+        _event("late", today + datetime.timedelta(days=1, hours=15)),
+        _event("multi", today + datetime.timedelta(hours=20), hours=30),
+        _event("early", today + datetime.timedelta(days=1, hours=9)),
+    ], *index.horizon(today.date()))
+
+    events = index.query(today, today + datetime.timedelta(days=3))
+    assert [event["uid"] for event in events] == ["multi", "early", "late"]
+    # Многодневное событие видно и в периоде, который начинается на следующий день
+    next_day = index.query(today + datetime.timedelta(days=1), today + datetime.timedelta(days=2))
+    assert [event["uid"] for event in next_day] == ["multi", "early", "late"]
+
+
+def test_event_ending_at_midnight_does_not_take_next_day():
+    today = _today()
+    index = DayIndex(horizon_days=7)
+    index.load([_event("evening", today + datetime.timedelta(hours=22), hours=2)], *index.horizon(today.date()))
+    assert index.query(today + datetime.timedelta(days=1), today + datetime.timedelta(days=2)) == []
+
+
+def test_roll_forward_fetches_only_new_days():
+    today = _today()
+    index = DayIndex(horizon_days=7, ttl=3600)
+    yesterday = today.date() - datetime.timedelta(days=1)
+    index.load([_event("old", today - datetime.timedelta(hours=10)), _event("kept", today + datetime.timedelta(hours=10))],
+               *index.horizon(yesterday))
+
+    missing_start, missing_end, rebuild = index.missing_range(today.date())
+    assert not rebuild
+    assert (missing_start, missing_end) == (today + datetime.timedelta(days=6), today + datetime.timedelta(days=7))
+    index.load([], missing_start, missing_end, rebuild)
+    assert index.missing_range(today.date()) is None
+    assert [event["uid"] for event in index.query(today, today + datetime.timedelta(days=7))] == ["kept"]
+
+
+def test_recurring_series_indexes_every_occurrence(stub_calendar):
+    today = _today()
+    start = today + datetime.timedelta(hours=9)
+    rrule = stub_calendar.build_rrule("WEEKLY", count=20)
+
+    async def scenario():
+        await stub_calendar.create_event("Планерка", start, start + datetime.timedelta(hours=1), rrule=rrule)
+        return await stub_calendar.get_events(today, today + datetime.timedelta(days=14))
+
+    events = asyncio.run(scenario())
+    assert [event["start_time"] for event in events] == [
+        start.isoformat(), (start + datetime.timedelta(days=7)).isoformat()]
+    assert stub_calendar.day_index.covers(today, today + datetime.timedelta(days=14))
+
+
+def test_failed_delete_keeps_event_in_index(stub_calendar, monkeypatch):
+    today = _today()
+    start = today + datetime.timedelta(hours=9)
+
+    def unavailable(uid):
+        raise ConnectionError("сервер недоступен")
+
+    async def scenario():
+        await stub_calendar.get_events(today, today + datetime.timedelta(days=1))
+        await stub_calendar.create_event("Встреча", start, start + datetime.timedelta(hours=1))
+        uid = (await stub_calendar.get_events(today, today + datetime.timedelta(days=1)))[0]["uid"]
+        monkeypatch.setattr(stub_calendar.caldav_calendar, "object_by_uid", unavailable)
+        result = await stub_calendar.delete_event(uid)
+        return result, await stub_calendar.get_events(today, today + datetime.timedelta(days=1))
+
+    result, events = asyncio.run(scenario())
+    assert result.startswith("Ошибка удаления")
+    assert [event["title"] for event in events] == ["Встреча"]
+
+
+def _write_during_fetch(calendar, write):
+    """Выполнить запись, пока идет запрос индекса (ответ сервера уже получен до нее)"""
+    original = calendar.fetch_events
+    done = []
+
+    async def fetch_events(start, end, fresh=False):
+        events = await original(start, end, fresh)
+        if not done:
+            done.append(await write())
+        return events
+
+    calendar.fetch_events = fetch_events
+    return done
+
+
+def test_create_during_refresh_is_not_lost(stub_calendar):
+    today = _today()
+    start = today + datetime.timedelta(hours=9)
+    _write_during_fetch(stub_calendar, lambda: stub_calendar.create_event(
+        "Встреча", start, start + datetime.timedelta(hours=1)))
+
+    async def scenario():
+        first = await stub_calendar.get_events(today, today + datetime.timedelta(days=1))
+        second = await stub_calendar.get_events(today, today + datetime.timedelta(days=1))
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert [event["title"] for event in first] == ["Встреча"]
+    assert [event["title"] for event in second] == ["Встреча"]
+
+
+def test_invalidate_during_refresh_drops_stale_snapshot(stub_calendar):
+    today = _today()
+    start = today + datetime.timedelta(hours=9)
+
+    async def scenario():
+        result = await stub_calendar.create_event("Планерка", start, start + datetime.timedelta(hours=1),
+                                                  rrule=stub_calendar.build_rrule("DAILY", count=3))
+        uid = result.split("UID: ")[1].rstrip(")")
+        _write_during_fetch(stub_calendar, lambda: stub_calendar.cancel_occurrence(uid, start))
+        first = await stub_calendar.get_events(today, today + datetime.timedelta(days=1))
+        second = await stub_calendar.get_events(today, today + datetime.timedelta(days=1))
+        return first, second
+
+    assert asyncio.run(scenario()) == ([], [])
+
+
+def test_load_rejects_outdated_generation():
+    today = _today()
+    index = DayIndex(horizon_days=7)
+    generation = index.generation
+    index.invalidate()
+    assert not index.load([_event("stale", today + datetime.timedelta(hours=9))], *index.horizon(today.date()),
+                          generation=generation)
+    assert index.missing_range(today.date()) is not None
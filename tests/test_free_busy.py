@@ -0,0 +1,110 @@
+"""
+Тесты занятости участников (free/busy)
+
+1. Разбор интервалов VFREEBUSY: UTC, длительность, FBTYPE=FREE, перенос строк
+2. Поиск общих свободных окон в рабочие часы
+3. Кэш занятости: повторный запрос, новый участник, другой период
+4. Инструмент get_free_busy: участники с ошибкой не считаются свободными
+"""
+
+import json
+import asyncio
+import datetime
+
+import main
+from yandex_calendar_events2 import YandexCalendarEvents
+
+DAY = datetime.datetime(2026, 10, 20)
+
+
+def _local(value: str) -> datetime.datetime:
+    """Момент UTC в локальном времени без часового пояса, как его возвращает модуль"""
+    moment = datetime.datetime.strptime(value, '%Y%m%dT%H%M%S').replace(tzinfo=datetime.timezone.utc)
+    return moment.astimezone().replace(tzinfo=None)
+
+
+def test_parse_freebusy_periods():
+    data = "\r\n".join([
+        "BEGIN:VCALENDAR",
+        "BEGIN:VFREEBUSY",
+        "FREEBUSY;FBTYPE=BUSY:20261020T070000Z/20261020T080000Z,20261020T120000Z/PT1H30M",
+        "FREEBUSY;FBTYPE=FREE:20261020T090000Z/PT2H",
+        "FREEBUSY:20261021T100000/PT45M",
+        "FREEBUSY;FBTYPE=BUSY-TENTATIVE:20261022T100000Z/",
+        " P1DT2H",
+        "END:VFREEBUSY",
+        "END:VCALENDAR",
+    ])
+    assert YandexCalendarEvents._parse_freebusy_periods(data) == [
+        (_local("20261020T070000"), _local("20261020T080000")),
+        (_local("20261020T120000"), _local("20261020T133000")),
+        (datetime.datetime(2026, 10, 21, 10, 0), datetime.datetime(2026, 10, 21, 10, 45)),
+        (_local("20261022T100000"), _local("20261023T120000")),
+    ]
+
+
+def test_find_common_free_slots():
+    def at(day: int, hour: int, minute: int = 0) -> datetime.datetime:
+        return DAY + datetime.timedelta(days=day, hours=hour, minutes=minute)
+
+    busy = [
+        (at(0, 15), at(0, 15, 30)),
+        (at(0, 10), at(0, 11)),
+        (at(0, 10, 30), at(0, 12)),
+        (at(1, 8), at(1, 18, 30)),
+    ]
+    slots = YandexCalendarEvents.find_common_free_slots(
+        busy, at(0, 9, 30), at(2, 0), datetime.timedelta(hours=1))
+    # 09:30-10:00 и 18:30-19:00 короче часа
+    assert slots == [(at(0, 12), at(0, 15)), (at(0, 15, 30), at(0, 19))]
+
+    slots = YandexCalendarEvents.find_common_free_slots(
+        [], at(0, 0), at(1, 0), datetime.timedelta(minutes=30), datetime.time(10), datetime.time(12))
+    assert slots == [(at(0, 10), at(0, 12))]
+
+
+def test_free_busy_cache(stub_server, stub_calendar):
+    store = stub_server.RequestHandlerClass.store
+    store.freebusy["a@test"] = ["FREEBUSY:20261020T100000/PT1H"]
+    store.freebusy["b@test"] = []
+
+    async def scenario():
+        first = await stub_calendar.get_free_busy([" A@test "], DAY, DAY + datetime.timedelta(days=2))
+        assert store.freebusy_requests == 1
+        # Период внутри уже полученного берется из кэша
+        cached = await stub_calendar.get_free_busy(["a@test"], DAY, DAY + datetime.timedelta(days=1))
+        assert store.freebusy_requests == 1
+        # Запрашивается только участник, которого нет в кэше
+        both = await stub_calendar.get_free_busy(["a@test", "b@test"], DAY, DAY + datetime.timedelta(days=1))
+        assert store.freebusy_requests == 2
+        # Период шире кэшированного требует нового запроса
+        await stub_calendar.get_free_busy(["a@test"], DAY, DAY + datetime.timedelta(days=3))
+        assert store.freebusy_requests == 3
+        # Неудачный ответ не кэшируется
+        await stub_calendar.get_free_busy(["unknown@test"], DAY, DAY + datetime.timedelta(days=1))
+        unknown = await stub_calendar.get_free_busy(["unknown@test"], DAY, DAY + datetime.timedelta(days=1))
+        assert store.freebusy_requests == 5
+        return first, cached, both, unknown
+
+    first, cached, both, unknown = asyncio.run(scenario())
+    busy = [(DAY + datetime.timedelta(hours=10), DAY + datetime.timedelta(hours=11))]
+    assert first == {"a@test": {"busy": busy, "status": "2.0;Success"}}
+    assert cached == {"a@test": {"busy": busy, "status": "2.0;cached"}}
+    assert both["b@test"] == {"busy": [], "status": "2.0;Success"}
+    assert unknown["unknown@test"]["status"].startswith("3.7")
+
+
+def test_tool_excludes_unresolved_attendees(stub_server, stub_calendar, monkeypatch):
+    store = stub_server.RequestHandlerClass.store
+    store.freebusy["a@test"] = ["FREEBUSY:20261020T090000/PT9H"]
+    monkeypatch.setattr(main, "calendar_event", stub_calendar)
+
+    result = json.loads(asyncio.run(main.get_free_busy("a@test,unknown@test", "20.10.2026", "20.10.2026")))
+    assert result["unresolved"] == ["unknown@test"]
+    assert result["attendees"]["unknown@test"]["busy"] == []
+    assert result["free_slots"] == [{"start": "20.10.2026 18:00", "end": "20.10.2026 19:00"}]
+
+    # Если занятость не удалось узнать ни у кого, общих окон нет
+    result = json.loads(asyncio.run(main.get_free_busy("unknown@test", "20.10.2026", "20.10.2026")))
+    assert result["unresolved"] == ["unknown@test"]
+    assert result["free_slots"] == []
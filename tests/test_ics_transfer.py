@@ -0,0 +1,140 @@
+"""
+Тесты импорта и экспорта .ics (ics_transfer.py)
+
+1. Разбор файла на объекты: серия с переопределениями, часовые пояса
+2. Экспорт серии без потерь: RRULE и EXDATE, один объект на серию
+3. Импорт переопределения, идущего в файле не подряд с серией
+4. Ошибка посреди экспорта не портит существующий файл
+"""
+
+import asyncio
+import datetime
+
+import pytest
+
+from ics_transfer import iter_ics_objects, import_ics, export_ics
+
+ICS = """BEGIN:VCALENDAR
+VERSION:2.0
+BEGIN:VTIMEZONE
+TZID:Europe/Moscow
+BEGIN:STANDARD
+DTSTART:19700101T000000
+TZOFFSETFROM:+0300
+TZOFFSETTO:+0300
+END:STANDARD
+END:VTIMEZONE
+BEGIN:VEVENT
+UID:series@test
+SUMMARY:Планерка
+DTSTART;TZID=Europe/Moscow:{start}
+DTEND;TZID=Europe/Moscow:{end}
+RRULE:FREQ=WEEKLY;COUNT=10
+END:VEVENT
+BEGIN:VEVENT
+UID:series@test
+RECURRENCE-ID;TZID=Europe/Moscow:{second}
+SUMMARY:Планерка (перенос)
+DTSTART;TZID=Europe/Moscow:{second_moved}
+DTEND;TZID=Europe/Moscow:{second_moved_end}
+END:VEVENT
+BEGIN:VEVENT
+UID:single@test
+SUMMARY:Обед
+DTSTART:{start}
+DTEND:{end}
+END:VEVENT
+BEGIN:VEVENT
+UID:series@test
+RECURRENCE-ID;TZID=Europe/Moscow:{third}
+SUMMARY:Планерка (длинная)
+DTSTART;TZID=Europe/Moscow:{third}
+DTEND;TZID=Europe/Moscow:{third_end}
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def _ics(start: datetime.datetime) -> str:
+    fmt = '%Y%m%dT%H%M%S'
+    week = datetime.timedelta(days=7)
+    hour = datetime.timedelta(hours=1)
+    return ICS.format(start=start.strftime(fmt), end=(start + hour).strftime(fmt),
+                      second=(start + week).strftime(fmt),
+                      second_moved=(start + week + hour).strftime(fmt),
+                      second_moved_end=(start + week + 2 * hour).strftime(fmt),
+                      third=(start + 2 * week).strftime(fmt),
+                      third_end=(start + 2 * week + 3 * hour).strftime(fmt))
+
+
+def _start() -> datetime.datetime:
+    return datetime.datetime.combine(datetime.date.today() + datetime.timedelta(days=1), datetime.time(10))
+
+
+def test_iter_ics_objects_groups_consecutive_components():
+    objects = list(iter_ics_objects(_ics(_start()).splitlines()))
+    assert [uid for uid, _ in objects] == ["series@test", "single@test", "series@test"]
+
+    series = objects[0][1]
+    assert series.count("BEGIN:VEVENT") == 2
+    assert "TZID:Europe/Moscow" in series
+    # Событию без TZID часовой пояс не нужен
+    assert "BEGIN:VTIMEZONE" not in objects[1][1]
+    assert "BEGIN:VTIMEZONE" in objects[2][1]
+
+
+def test_import_merges_non_consecutive_override(stub_calendar, tmp_path):
+    path = tmp_path / "calendar.ics"
+    path.write_text(_ics(_start()), encoding='utf-8')
+
+    report = asyncio.run(import_ics(stub_calendar, str(path), concurrency=4))
+    assert report == {"created": 2, "updated": 1, "skipped": 0, "failed": 0, "errors": []}
+    _, ical, _ = stub_calendar._fetch_event_object("series@test")
+    assert ical.count("BEGIN:VEVENT") == 3
+    assert ical.count("BEGIN:VTIMEZONE") == 1
+
+    # Повторный импорт ничего не меняет
+    report = asyncio.run(import_ics(stub_calendar, str(path), concurrency=4))
+    assert report == {"created": 0, "updated": 0, "skipped": 3, "failed": 0, "errors": []}
+
+
+def test_export_keeps_series_unexpanded(stub_calendar, tmp_path):
+    start = _start()
+    rrule = stub_calendar.build_rrule("WEEKLY", count=20)
+
+    async def scenario():
+        await stub_calendar.create_event("Планерка", start, start + datetime.timedelta(hours=1), rrule=rrule)
+        await stub_calendar.cancel_occurrence(
+            (await stub_calendar.get_events(start, start + datetime.timedelta(days=1)))[0]["uid"],
+            start + datetime.timedelta(days=7))
+        # Период больше окна экспорта: серия попадает в несколько окон
+        return await export_ics(stub_calendar, str(tmp_path / "backup.ics"),
+                                start - datetime.timedelta(days=1), start + datetime.timedelta(days=150))
+
+    report = asyncio.run(scenario())
+    assert report["exported"] == 1
+    data = (tmp_path / "backup.ics").read_text(encoding='utf-8')
+    assert data.count("BEGIN:VEVENT") == 1
+    assert "RRULE:FREQ=WEEKLY;COUNT=20" in data
+    assert "EXDATE" in data
+    assert "RECURRENCE-ID" not in data
+
+
+def test_failed_export_keeps_previous_file(stub_calendar, tmp_path):
+    path = tmp_path / "backup.ics"
+    path.write_text("previous backup", encoding='utf-8')
+    start = _start()
+    calls = []
+
+    async def search_event_objects(window_start, window_end):
+        calls.append(window_start)
+        if len(calls) > 1:
+            raise ConnectionError("сервер недоступен")
+        return []
+
+    stub_calendar.search_event_objects = search_event_objects
+    with pytest.raises(ConnectionError):
+        asyncio.run(export_ics(stub_calendar, str(path), start, start + datetime.timedelta(days=150)))
+    assert len(calls) == 2
+    assert path.read_text(encoding='utf-8') == "previous backup"
+    assert [item.name for item in tmp_path.iterdir()] == ["backup.ics"]
@@ -0,0 +1,92 @@
+"""
+Тесты идемпотентного создания событий (ключ идемпотентности)
+
+1. UID из ключа детерминирован (UUID5) и зависит от аккаунта
+2. Повтор с тем же ключом отвечается из таблицы без обращения к серверу
+3. Таблица переживает перезапуск, устаревшие записи отбрасываются
+4. Без таблицы повтор отсекается условным PUT (If-None-Match: * -> 412)
+5. Одновременные вызовы с одним ключом создают один объект
+"""
+
+import json
+import asyncio
+import datetime
+
+from yandex_calendar_events2 import YandexCalendarEvents, IDEMPOTENCY_TTL
+
+START = datetime.datetime.combine(datetime.date.today() + datetime.timedelta(days=1), datetime.time(10))
+END = START + datetime.timedelta(hours=1)
+
+
+def _store(stub_server):
+    return stub_server.RequestHandlerClass.store
+
+
+def test_uid_from_key_is_deterministic():
+    first = YandexCalendarEvents(username="user@yandex.ru")
+    second = YandexCalendarEvents(username="user@yandex.ru")
+    other = YandexCalendarEvents(username="other@yandex.ru")
+    assert first._new_event_uid("key-1") == second._new_event_uid("key-1")
+    assert first._new_event_uid("key-1") != first._new_event_uid("key-2")
+    assert first._new_event_uid("key-1") != other._new_event_uid("key-1")
+    assert first._new_event_uid() != first._new_event_uid()
+
+
+def test_repeated_key_is_answered_from_table(stub_server, stub_calendar):
+    async def scenario():
+        first = await stub_calendar.create_event("Встреча", START, END, idempotency_key="once")
+        _store(stub_server).objects.clear()
+        # Сервер больше не спрашивается: объект не создается заново
+        second = await stub_calendar.create_event("Встреча", START, END, idempotency_key="once")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert "успешно создано (UID" in first
+    assert second == first
+    assert _store(stub_server).objects == {}
+
+
+def test_table_survives_restart_and_is_pruned(stub_server, stub_calendar, tmp_path):
+    table_file = str(tmp_path / "idempotency.json")
+    url = stub_calendar.caldav_url
+    calendar = YandexCalendarEvents(url, "test", "test", idempotency_file=table_file)
+    first = asyncio.run(calendar.create_event("Встреча", START, END, idempotency_key="restart"))
+
+    with open(table_file, encoding='utf-8') as f:
+        table = json.load(f)
+    table["stale"] = {"uid": "stale@yandex.ru", "result": "старый результат",
+                      "created": (datetime.datetime.now() - IDEMPOTENCY_TTL - datetime.timedelta(minutes=1)).isoformat()}
+    with open(table_file, 'w', encoding='utf-8') as f:
+        json.dump(table, f)
+
+    restarted = YandexCalendarEvents(url, "test", "test", idempotency_file=table_file)
+    assert set(restarted._idempotency) == {"restart"}
+    _store(stub_server).objects.clear()
+    assert asyncio.run(restarted.create_event("Встреча", START, END, idempotency_key="restart")) == first
+    assert _store(stub_server).objects == {}
+
+
+def test_repeat_without_table_is_rejected_by_server(stub_server, stub_calendar):
+    restarted = YandexCalendarEvents(stub_calendar.caldav_url, "test", "test")
+
+    async def scenario():
+        first = await stub_calendar.create_event("Встреча", START, END, idempotency_key="412")
+        second = await restarted.create_event("Встреча", START, END, idempotency_key="412")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    uid = stub_calendar._new_event_uid("412")
+    assert f"успешно создано (UID: {uid})" in first
+    assert f"успешно создано ранее (UID: {uid})" in second
+    assert len(_store(stub_server).objects) == 1
+
+
+def test_concurrent_calls_with_same_key_create_one_object(stub_server, stub_calendar):
+    async def scenario():
+        await stub_calendar.ensure_connected()
+        return await asyncio.gather(*[
+            stub_calendar.create_event("Встреча", START, END, idempotency_key="parallel") for _ in range(4)])
+
+    results = asyncio.run(scenario())
+    assert all("успешно" in result for result in results)
+    assert len(_store(stub_server).objects) == 1
@@ -0,0 +1,167 @@
+"""
+Тесты повторяющихся событий (yandex_calendar_events2.py)
+
+1. Правило повторения RRULE и проверка аргументов
+2. Отмена одного повторения (EXDATE) в формате DTSTART серии
+3. Изменение одного повторения (VEVENT с RECURRENCE-ID)
+   и отказ для времени, которое не является повторением серии
+4. Основной VEVENT серии и отказ для неповторяющегося события
+5. Серия с измененным и отмененным повторениями: получение событий,
+   статистика и экспорт
+"""
+
+import asyncio
+import datetime
+
+import pytest
+
+from calendar_stats import compute_calendar_stats
+from ics_transfer import export_ics
+from yandex_calendar_events2 import YandexCalendarEvents
+
+SERIES = """BEGIN:VCALENDAR
+VERSION:2.0
+BEGIN:VEVENT
+UID:series@test
+SUMMARY:Планерка
+DESCRIPTION:Еженедельная
+DTSTART{dtstart}
+DTEND{dtend}
+RRULE:FREQ=WEEKLY;COUNT=10
+END:VEVENT
+END:VCALENDAR
+"""
+
+TZ_SERIES = SERIES.format(dtstart=";TZID=Europe/Moscow:20261005T100000",
+                          dtend=";TZID=Europe/Moscow:20261005T110000")
+OCCURRENCE = datetime.datetime(2026, 10, 12, 10, 0)
+
+
+def _props(ical: str):
+    return YandexCalendarEvents._ical_properties(ical)
+
+
+def test_build_rrule():
+    build = YandexCalendarEvents.build_rrule
+    assert build("weekly", interval=2, count=5, by_day=["mo", " WE"]) == "FREQ=WEEKLY;INTERVAL=2;COUNT=5;BYDAY=MO,WE"
+    assert build("DAILY", until=datetime.datetime(2026, 12, 31, 23, 59)) == "FREQ=DAILY;UNTIL=20261231T235900"
+    with pytest.raises(ValueError):
+        build("HOURLY")
+    with pytest.raises(ValueError):
+        build("DAILY", count=3, until=datetime.datetime(2026, 12, 31))
+    with pytest.raises(ValueError):
+        build("WEEKLY", by_day=["XX"])
+
+
+def test_add_exdate_matches_dtstart_format():
+    props = _props(YandexCalendarEvents._add_exdate(TZ_SERIES, OCCURRENCE))
+    begin, end = YandexCalendarEvents._master_vevent(props)
+    assert "EXDATE;TZID=Europe/Moscow:20261012T100000" in props[begin:end]
+
+    all_day = SERIES.format(dtstart=";VALUE=DATE:20261005", dtend=";VALUE=DATE:20261006")
+    assert "EXDATE;VALUE=DATE:20261012" in _props(YandexCalendarEvents._add_exdate(all_day, OCCURRENCE))
+
+    # Повторение задано местным временем, а серия хранится в UTC
+    series_start = OCCURRENCE.astimezone(datetime.timezone.utc) - datetime.timedelta(days=7)
+    utc = SERIES.format(dtstart=series_start.strftime(":%Y%m%dT%H%M%SZ"),
+                        dtend=(series_start + datetime.timedelta(hours=1)).strftime(":%Y%m%dT%H%M%SZ"))
+    expected = OCCURRENCE.astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    assert f"EXDATE:{expected}" in _props(YandexCalendarEvents._add_exdate(utc, OCCURRENCE))
+
+
+def test_add_exdate_drops_override_of_cancelled_occurrence():
+    ical = YandexCalendarEvents._add_override(TZ_SERIES, OCCURRENCE, title="Перенос")
+    ical = YandexCalendarEvents._add_exdate(ical, OCCURRENCE)
+    assert ical.count("BEGIN:VEVENT") == 1
+    assert "RECURRENCE-ID" not in ical
+
+
+def test_add_override_keeps_series_duration_and_properties():
+    moved = OCCURRENCE + datetime.timedelta(hours=5)
+    ical = YandexCalendarEvents._add_override(TZ_SERIES, OCCURRENCE, start=moved, title="Перенос")
+    props = _props(ical)
+    begin, end = [block for block in YandexCalendarEvents._vevent_blocks(props)
+                  if YandexCalendarEvents._find_property(props, *block, 'RECURRENCE-ID')][0]
+    override = props[begin:end + 1]
+    assert "RECURRENCE-ID;TZID=Europe/Moscow:20261012T100000" in override
+    assert "DTSTART;TZID=Europe/Moscow:20261012T150000" in override
+    assert "DTEND;TZID=Europe/Moscow:20261012T160000" in override
+    assert "SUMMARY:Перенос" in override and "SUMMARY:Планерка" not in override
+    assert "DESCRIPTION:Еженедельная" in override
+    assert not any(prop.startswith(("RRULE", "EXDATE")) for prop in override)
+    assert sum(prop.startswith("DTSTAMP:") for prop in override) == 1
+
+    # Повторное изменение того же повторения заменяет прежнее переопределение
+    ical = YandexCalendarEvents._add_override(ical, OCCURRENCE, title="Еще раз")
+    assert ical.count("RECURRENCE-ID") == 1
+    assert "SUMMARY:Еще раз" in ical
+
+
+def test_occurrence_must_belong_to_series():
+    for not_occurrence in (OCCURRENCE + datetime.timedelta(hours=1), OCCURRENCE + datetime.timedelta(days=1),
+                           OCCURRENCE + datetime.timedelta(weeks=10)):
+        with pytest.raises(ValueError):
+            YandexCalendarEvents._add_exdate(TZ_SERIES, not_occurrence)
+        with pytest.raises(ValueError):
+            YandexCalendarEvents._add_override(TZ_SERIES, not_occurrence, title="Фантом")
+
+    # Отмененное повторение изменить уже нельзя, а перенесенное - можно, в том числе отменить
+    cancelled = YandexCalendarEvents._add_exdate(TZ_SERIES, OCCURRENCE)
+    with pytest.raises(ValueError):
+        YandexCalendarEvents._add_override(cancelled, OCCURRENCE, title="Фантом")
+    moved = YandexCalendarEvents._add_override(TZ_SERIES, OCCURRENCE, start=OCCURRENCE + datetime.timedelta(days=5))
+    assert "EXDATE" in YandexCalendarEvents._add_exdate(moved, OCCURRENCE)
+
+
+def test_master_vevent_requires_recurring_event():
+    props = _props(TZ_SERIES)
+    assert YandexCalendarEvents._master_vevent(props) == (2, len(props) - 2)
+
+    single = TZ_SERIES.replace("RRULE:FREQ=WEEKLY;COUNT=10\n", "")
+    with pytest.raises(ValueError):
+        YandexCalendarEvents._master_vevent(_props(single))
+
+    override_only = YandexCalendarEvents._add_override(TZ_SERIES, OCCURRENCE)
+    props = _props(override_only)
+    begin, end = YandexCalendarEvents._master_vevent(props)
+    with pytest.raises(ValueError):
+        YandexCalendarEvents._master_vevent(props[:begin] + props[end + 1:])
+
+
+def test_series_through_get_stats_and_export(stub_calendar, tmp_path):
+    today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+    start = today + datetime.timedelta(days=1, hours=10)
+    week = datetime.timedelta(days=7)
+    period_end = today + datetime.timedelta(days=35)
+
+    async def scenario():
+        result = await stub_calendar.create_event("Планерка", start, start + datetime.timedelta(hours=1),
+                                                  rrule=stub_calendar.build_rrule("WEEKLY", count=4))
+        uid = result.split("UID: ")[1].rstrip(")")
+        moved = start + week + datetime.timedelta(days=1, hours=5)
+        await stub_calendar.modify_occurrence(uid, start + week, start=moved,
+                                              end=moved + datetime.timedelta(minutes=90), title="Перенос")
+        await stub_calendar.cancel_occurrence(uid, start + 2 * week)
+        wrong_time = await stub_calendar.cancel_occurrence(uid, start + 3 * week + datetime.timedelta(hours=1))
+        assert wrong_time.startswith("Ошибка отмены повторения")
+        events = await stub_calendar.get_events(today, period_end)
+        report = await export_ics(stub_calendar, str(tmp_path / "backup.ics"), today, period_end)
+        return events, report
+
+    events, report = asyncio.run(scenario())
+    assert [(event["title"], event["start_time"]) for event in events] == [
+        ("Планерка", start.isoformat()),
+        ("Перенос", (start + week + datetime.timedelta(days=1, hours=5)).isoformat()),
+        ("Планерка", (start + 3 * week).isoformat()),
+    ]
+
+    stats = compute_calendar_stats(events, today, period_end, "week")
+    assert stats["events"] == 3
+    assert stats["busy_hours"] == 3.5
+
+    assert report["exported"] == 1
+    data = (tmp_path / "backup.ics").read_text(encoding='utf-8')
+    assert data.count("BEGIN:VEVENT") == 2
+    assert data.count("RRULE:FREQ=WEEKLY;COUNT=4") == 1
+    assert data.count("RECURRENCE-ID") == 1
+    assert "EXDATE" in data
@@ -0,0 +1,146 @@
+"""
+Тесты очереди записи (write_queue.py) на CalDAV-заглушке
+
+1. Первая операция очереди сама выполняет подключение к календарю
+2. Запись принимается без подключения, а отправка повторяет подключение
+3. Удаление отсутствующего события видно в состоянии очереди
+4. Отправленное событие в индексе по дням теряет отметку pending
+5. Операции прошлого запуска отправляются с первого вызова инструмента
+6. Отклоненное сервером создание убирается из индекса по дням
+"""
+
+import socket
+import asyncio
+import datetime
+
+import write_queue
+import yandex_calendar_events2
+from caldav_stub import start_stub
+from write_queue import WriteQueue, RETRY_MIN_DELAY
+from yandex_calendar_events2 import YandexCalendarEvents, CalDAVStatusError
+
+
+def _ical(uid: str, start: datetime.datetime) -> str:
+    return (f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nBEGIN:VEVENT\r\n"
+            f"DTSTART:{start.strftime('%Y%m%dT%H%M%S')}\r\n"
+            f"DTEND:{(start + datetime.timedelta(hours=1)).strftime('%Y%m%dT%H%M%S')}\r\n"
+            f"SUMMARY:{uid}\r\nUID:{uid}\r\nEND:VEVENT\r\nEND:VCALENDAR")
+
+
+async def _drain(queue: WriteQueue):
+    """Дождаться окончания фоновой отправки (при повторах с паузой тест падает по таймауту)"""
+    await asyncio.wait_for(asyncio.shield(queue._task), timeout=RETRY_MIN_DELAY / 2)
+
+
+def test_replay_connects_before_first_write(stub_calendar, tmp_path):
+    start = datetime.datetime.combine(datetime.date.today(), datetime.time(10))
+    queue = WriteQueue(stub_calendar, str(tmp_path / "queue.json"))
+
+    async def scenario():
+        queue.enqueue_create("queued", _ical("queued", start))
+        await _drain(queue)
+        return await stub_calendar.fetch_events(start, start + datetime.timedelta(hours=1))
+
+    events = asyncio.run(scenario())
+    assert queue.status()["operations"] == []
+    assert [(event["uid"], event.get("pending")) for event in events] == [("queued", None)]
+
+
+def test_offline_write_is_accepted_and_replayed_after_reconnect(monkeypatch, tmp_path):
+    monkeypatch.setattr(yandex_calendar_events2, "CONNECT_RETRY_INTERVAL", 0)
+    monkeypatch.setattr(write_queue, "RETRY_MIN_DELAY", 0.05)
+    # Порт, на котором пока никто не слушает: календарь недоступен
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    calendar = YandexCalendarEvents(f"http://127.0.0.1:{port}/", "offline", "test")
+    calendar.enable_write_queue(str(tmp_path / "queue.json"))
+    start = datetime.datetime.combine(datetime.date.today(), datetime.time(10))
+
+    async def scenario():
+        result = await calendar.create_event("Офлайн", start, start + datetime.timedelta(hours=1))
+        while not calendar.write_queue.pending()[0]["attempts"]:
+            await asyncio.sleep(0.01)
+        server = start_stub(port)
+        try:
+            await asyncio.wait_for(asyncio.shield(calendar.write_queue._task), timeout=5)
+            return result, await calendar.fetch_events(start, start + datetime.timedelta(hours=1))
+        finally:
+            server.shutdown()
+
+    result, events = asyncio.run(scenario())
+    assert "успешно принято" in result
+    assert calendar.write_queue.status()["operations"] == []
+    assert [event["title"] for event in events] == ["Офлайн"]
+
+
+def test_delete_of_missing_event_is_reported(stub_calendar, tmp_path):
+    queue = WriteQueue(stub_calendar, str(tmp_path / "queue.json"))
+
+    async def scenario():
+        queue.enqueue_delete("missing")
+        await _drain(queue)
+
+    asyncio.run(scenario())
+    status = queue.status(clear_finished=True)
+    assert status["not_found"] == 1
+    assert [(op["uid"], op["state"]) for op in status["operations"]] == [("missing", "not_found")]
+    assert queue.status()["operations"] == []
+
+
+def test_replayed_event_loses_pending_mark_in_day_index(stub_calendar, tmp_path):
+    today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+    start = today + datetime.timedelta(hours=10)
+    stub_calendar.enable_write_queue(str(tmp_path / "queue.json"))
+
+    async def scenario():
+        await stub_calendar.get_events(today, today + datetime.timedelta(days=1))
+        await stub_calendar.create_event("Из очереди", start, start + datetime.timedelta(hours=1))
+        before = [event.get("pending") for event in await stub_calendar.get_events(
+            today, today + datetime.timedelta(days=1))]
+        await _drain(stub_calendar.write_queue)
+        after = [event.get("pending") for event in await stub_calendar.get_events(
+            today, today + datetime.timedelta(days=1))]
+        return before, after
+
+    assert asyncio.run(scenario()) == ([True], [None])
+
+
+def test_queue_left_by_previous_run_replays_on_first_call(stub_server, stub_calendar, tmp_path):
+    path = str(tmp_path / "queue.json")
+    start = datetime.datetime.combine(datetime.date.today(), datetime.time(10))
+    previous = WriteQueue(stub_calendar, path)
+    previous._ops.append(previous._new_op("create", "left@test", ical=_ical("left@test", start)))
+    previous._save()
+
+    calendar = YandexCalendarEvents(stub_calendar.caldav_url, "test", "test")
+    calendar.enable_write_queue(path)
+
+    async def scenario():
+        # Вызов, который не читает события и ничего не ставит в очередь
+        await calendar.cancel_occurrence("missing@test", start)
+        await _drain(calendar.write_queue)
+
+    asyncio.run(scenario())
+    assert calendar.write_queue.status()["operations"] == []
+    assert stub_calendar._fetch_event_object("left@test") is not None
+
+
+def test_rejected_create_leaves_day_index(stub_calendar, tmp_path):
+    today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+    start = today + datetime.timedelta(hours=10)
+    stub_calendar.enable_write_queue(str(tmp_path / "queue.json"))
+
+    def rejected(uid, ical):
+        raise CalDAVStatusError(403, "CalDAV PUT вернул статус 403 Forbidden")
+
+    stub_calendar._put_new_event_etag = rejected
+
+    async def scenario():
+        await stub_calendar.get_events(today, today + datetime.timedelta(days=1))
+        await stub_calendar.create_event("Запрещено", start, start + datetime.timedelta(hours=1))
+        await _drain(stub_calendar.write_queue)
+        return await stub_calendar.get_events(today, today + datetime.timedelta(days=1))
+
+    assert asyncio.run(scenario()) == []
+    assert stub_calendar.write_queue.status()["failed"] == 1
@@ -0,0 +1,271 @@
+"""
+Профилирование вызовов инструментов MCP-сервера Яндекс Календаря
+
+Режим включается переменной окружения YANDEX_MCP_PROFILE:
+
+1. cprofile - детерминированный профиль cProfile, файл .prof на каждый
+   вызов (смотреть в snakeviz, gprof2dot или `python -m pstats`)
+2. sampling - выборочный профиль по стекам потоков, файл .folded на каждый
+   вызов в формате collapsed stacks (как `py-spy record --format raw`),
+   из которого flamegraph.pl, inferno или speedscope строят flame graph
+
+Профилируется весь путь вызова: код инструмента в main.py и
+YandexCalendarEvents на потоке цикла событий и запросы CalDAV в рабочих
+потоках (_run_caldav). Выборки относятся к вызову точно и при
+одновременных вызовах. cProfile умеет профилировать поток цикла событий
+только для одного вызова за раз: в профиль попадает и код других задач,
+выполнявшихся в это время, а одновременные вызовы получают только часть
+рабочих потоков. Под нагрузкой используйте sampling.
+
+Без переменной окружения декораторы возвращают функции без изменений.
+
+Дополнительные настройки:
+- YANDEX_MCP_PROFILE_DIR - каталог для профилей (по умолчанию: profiles)
+- YANDEX_MCP_PROFILE_INTERVAL_MS - период выборки для sampling в мс (по умолчанию: 5)
+
+Автор: Alexander Gorlov
+Лицензия: MIT
+"""
+
+import os
+import sys
+import time
+import datetime
+import functools
+import itertools
+import threading
+import contextvars
+from collections import Counter
+from typing import List, Dict, Any, Optional
+
+PROFILE_MODES = ("cprofile", "sampling")
+
+PROFILE_MODE = os.getenv("YANDEX_MCP_PROFILE", "").strip().lower()
+PROFILE_DIR = os.getenv("YANDEX_MCP_PROFILE_DIR", "profiles")
+SAMPLE_INTERVAL = float(os.getenv("YANDEX_MCP_PROFILE_INTERVAL_MS", "5")) / 1000
+
+if PROFILE_MODE and PROFILE_MODE not in PROFILE_MODES:
+    print(f"Неизвестный режим профилирования YANDEX_MCP_PROFILE={PROFILE_MODE}, "
+          f"допустимо: {', '.join(PROFILE_MODES)}. Профилирование отключено", file=sys.stderr)
+    PROFILE_MODE = ""
+
+# Вызов инструмента, к которому относится текущий код. asyncio.to_thread копирует
+# контекст, поэтому значение видно и в рабочих потоках CalDAV
+_current_call: contextvars.ContextVar = contextvars.ContextVar("profiled_call", default=None)
+_call_numbers = itertools.count(1)
+
+
+class _CallProfile:
+    """Профиль одного вызова инструмента"""
+
+    # Вызов, который сейчас профилирует поток цикла событий через cProfile
+    loop_owner: Optional["_CallProfile"] = None
+
+    def __init__(self, tool_name: str, frame):
+        self.tool_name = tool_name
+        self.number = next(_call_numbers)
+        # Кадр корутины-обертки: по нему выборки потока цикла событий относятся к вызову
+        self.frame = frame
+        self.samples: Counter = Counter()
+        self.profiles: List[Any] = []
+        self.loop_profile = None
+        self.started = 0.0
+        self.elapsed = 0.0
+
+    def start(self):
+        self.started = time.perf_counter()
+        if PROFILE_MODE == "sampling":
+            _sampler.register_call(self)
+        elif _CallProfile.loop_owner is None:
+            self.loop_profile = _enable_cprofile()
+            if self.loop_profile:
+                _CallProfile.loop_owner = self
+
+    def stop(self):
+        if self.loop_profile:
+            self.loop_profile.disable()
+            _CallProfile.loop_owner = None
+        if PROFILE_MODE == "sampling":
+            _sampler.unregister_call(self)
+        self.elapsed = time.perf_counter() - self.started
+
+    def run_in_thread(self, func, args):
+        """Выполнить функцию в рабочем потоке, учитывая ее в профиле вызова"""
+        if PROFILE_MODE == "sampling":
+            _sampler.register_thread(self)
+            try:
+                return _profiled_thread_call(func, args)
+            finally:
+                _sampler.unregister_thread()
+
+        profile = _enable_cprofile()
+        if profile is None:
+            return func(*args)
+        try:
+            return func(*args)
+        finally:
+            profile.disable()
+            self.profiles.append(profile)
+
+    def save(self) -> Optional[str]:
+        """Записать профиль в файл и вывести короткую сводку в stderr"""
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+            base = os.path.join(PROFILE_DIR, f"{stamp}-{self.number:05d}-{self.tool_name}")
+            if PROFILE_MODE == "sampling":
+                path = f"{base}.folded"
+                with open(path, 'w', encoding='utf-8') as f:
+                    for stack, count in self.samples.most_common():
+                        f.write(f"{stack} {count}\n")
+                detail = f"выборок: {sum(self.samples.values())}"
+            else:
+                import pstats
+                path = f"{base}.prof"
+                profiles = ([self.loop_profile] if self.loop_profile else []) + self.profiles
+                stats = pstats.Stats(*profiles) if profiles else pstats.Stats()
+                stats.dump_stats(path)
+                detail = "с потоком цикла событий" if self.loop_profile else \
+                    "только рабочие потоки (цикл событий занят другим вызовом)"
+        except OSError as e:
+            print(f"Не удалось сохранить профиль {self.tool_name}: {str(e)}", file=sys.stderr)
+            return None
+        print(f"Профиль {self.tool_name}: {self.elapsed * 1000:.1f} мс, {detail}, {path}", file=sys.stderr)
+        return path
+
+
+def _enable_cprofile():
+    """
+    Запустить cProfile в текущем потоке
+
+    Начиная с Python 3.12 cProfile работает через sys.monitoring: активный
+    профиль видит все потоки, а второй включить нельзя (ValueError).
+    В этом случае работа потока уже попадает в активный профиль.
+    """
+    import cProfile
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        return None
+    return profile
+
+
+def _profiled_thread_call(func, args):
+    """Граница стека рабочего потока: кадры выше нее (пул потоков) в профиль не попадают"""
+    return func(*args)
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _Sampler:
+    """
+    Фоновый поток, который раз в SAMPLE_INTERVAL снимает стеки всех потоков
+    и относит их к профилируемым вызовам. Время ожидания (сеть, семафор)
+    тоже попадает в выборки, как в `py-spy --idle`
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frames: Dict[int, _CallProfile] = {}
+        self._threads: Dict[int, _CallProfile] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def register_call(self, call: _CallProfile):
+        with self._lock:
+            self._frames[id(call.frame)] = call
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="mcp-profile-sampler", daemon=True)
+                self._thread.start()
+
+    def unregister_call(self, call: _CallProfile):
+        with self._lock:
+            self._frames.pop(id(call.frame), None)
+
+    def register_thread(self, call: _CallProfile):
+        with self._lock:
+            self._threads[threading.get_ident()] = call
+
+    def unregister_thread(self):
+        with self._lock:
+            self._threads.pop(threading.get_ident(), None)
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while True:
+            time.sleep(SAMPLE_INTERVAL)
+            # Под блокировкой: после unregister_call выборки в профиль вызова уже не попадут
+            with self._lock:
+                if not self._frames and not self._threads:
+                    self._thread = None
+                    return
+                for ident, frame in sys._current_frames().items():
+                    if ident != own_ident:
+                        self._sample(frame, self._threads.get(ident), self._frames)
+
+    @staticmethod
+    def _sample(frame, thread_call: Optional[_CallProfile], frames: Dict[int, _CallProfile]):
+        """Свернуть стек потока в строку и добавить к профилю вызова, которому он принадлежит"""
+        stack = []
+        while frame is not None:
+            if thread_call is not None:
+                if frame.f_code is _profiled_thread_call.__code__:
+                    thread_call.samples[";".join([thread_call.tool_name, "caldav-thread"] + stack[::-1])] += 1
+                    return
+            else:
+                call = frames.get(id(frame))
+                if call is not None and call.frame is frame:
+                    call.samples[";".join([call.tool_name] + stack[::-1])] += 1
+                    return
+            stack.append(_frame_name(frame))
+            frame = frame.f_back
+
+
+_sampler = _Sampler()
+
+
+def profile_tool(func):
+    """
+    Декоратор инструмента MCP: профилировать каждый вызов, если профилирование включено
+
+    Сигнатура функции сохраняется (functools.wraps), поэтому FastMCP строит
+    ту же схему параметров.
+    """
+    if not PROFILE_MODE:
+        return func
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        call = _CallProfile(func.__name__, sys._getframe())
+        token = _current_call.set(call)
+        call.start()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            call.stop()
+            _current_call.reset(token)
+            call.save()
+
+    return wrapper
+
+
+def profile_thread_call(func):
+    """
+    Обернуть синхронную функцию, выполняемую в рабочем потоке, чтобы она
+    попала в профиль вызвавшего ее инструмента
+    """
+    if not PROFILE_MODE:
+        return func
+
+    @functools.wraps(func)
+    def run(*args):
+        call = _current_call.get()
+        if call is None:
+            return func(*args)
+        return call.run_in_thread(func, args)
+
+    return run
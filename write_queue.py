@@ -0,0 +1,305 @@
+"""
+Очередь записи в Яндекс Календарь с фоновой отправкой (write-ahead queue)
+
+Когда Яндекс отвечает медленно или недоступен, создание и удаление событий
+не должны блокировать вызов инструмента. Очередь:
+
+1. Сразу сохраняет операцию в файл и подтверждает ее вызывающему
+2. Сразу учитывает операцию при чтении событий (созданные события видны,
+   удаленные - скрыты), не дожидаясь сервера
+3. Отправляет операции на сервер в фоне строго по порядку, повторяя
+   попытки с нарастающей паузой при сетевых ошибках
+4. Обнаруживает конфликты по ETag: событие, измененное в другом клиенте
+   после создания через очередь, не будет удалено
+5. Сообщает состояние операций (get_write_queue_status), в том числе
+   удаления событий, которых на сервере уже не оказалось
+
+Операции принимаются и без подключения к календарю: подключение
+выполняется (и при неудаче повторяется) во время фоновой отправки.
+
+Файл очереди переживает перезапуск сервера: неотправленные операции
+будут отправлены после запуска, начиная с первого вызова инструмента.
+
+Автор: Alexander Gorlov
+Лицензия: MIT
+"""
+
+import os
+import sys
+import json
+import uuid
+import asyncio
+import datetime
+from typing import List, Dict, Any, Optional
+
+from yandex_calendar_events2 import CalDAVStatusError
+
+# Пауза между повторами при временных ошибках (секунды)
+RETRY_MIN_DELAY = 1
+RETRY_MAX_DELAY = 300
+
+# Сколько ETag созданных через очередь событий помнить для обнаружения конфликтов
+MAX_REMEMBERED_ETAGS = 1000
+
+# Состояния операции
+PENDING = "pending"
+CONFLICT = "conflict"
+FAILED = "failed"
+NOT_FOUND = "not_found"
+
+
+class WriteQueue:
+    def __init__(self, calendar, path: str):
+        """
+        Args:
+            calendar (YandexCalendarEvents): Календарь, в который отправляются операции
+            path (str): Файл для хранения очереди
+        """
+        self.calendar = calendar
+        self.path = path
+        self.completed = 0
+        state = self._load()
+        self._ops: List[Dict[str, Any]] = state.get("ops", [])
+        # UID -> ETag объекта, каким его создала очередь
+        self._etags: Dict[str, str] = state.get("etags", {})
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def _load(self) -> Dict[str, Any]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Не удалось прочитать очередь записи: {str(e)}", file=sys.stderr)
+            return {}
+
+    def _save(self):
+        """Атомарная запись очереди в файл"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"ops": self._ops, "etags": self._etags}, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _new_op(self, kind: str, event_uid: str, **fields) -> Dict[str, Any]:
+        now = datetime.datetime.now().isoformat()
+        op = {
+            "id": str(uuid.uuid4()),
+            "op": kind,
+            "uid": event_uid,
+            "state": PENDING,
+            "attempts": 0,
+            "error": None,
+            "enqueued": now,
+            "updated": now,
+        }
+        op.update(fields)
+        return op
+
+    def enqueue_create(self, event_uid: str, ical: str) -> Dict[str, Any]:
+        """Поставить в очередь создание события"""
+        op = self._new_op("create", event_uid, ical=ical)
+        self._ops.append(op)
+        self._save()
+        self.ensure_running()
+        return op
+
+    def enqueue_delete(self, event_uid: str) -> Dict[str, Any]:
+        """
+        Поставить в очередь удаление события
+
+        Если создание этого события еще не отправлено, обе операции
+        просто убираются из очереди и на сервер ничего не уходит.
+        """
+        for op in self._ops:
+            # Создание, которое еще ни разу не отправлялось, можно просто отменить
+            if op["op"] == "create" and op["uid"] == event_uid and op["state"] == PENDING \
+                    and op["attempts"] == 0 and op is not self._in_flight():
+                self._ops.remove(op)
+                self._save()
+                return op
+
+        # ETag объекта, созданного через очередь, позволяет заметить его изменение в другом клиенте
+        op = self._new_op("delete", event_uid, expected_etag=self._etags.pop(event_uid, None))
+        self._ops.append(op)
+        self._save()
+        self.ensure_running()
+        return op
+
+    def _in_flight(self) -> Optional[Dict[str, Any]]:
+        """Операция, которая сейчас отправляется (первая ожидающая)"""
+        return next((op for op in self._ops if op["state"] == PENDING), None) \
+            if self._task and not self._task.done() else None
+
+    def ensure_running(self, wake: bool = True):
+        """
+        Запустить фоновую отправку, если в очереди есть операции (нужен запущенный цикл событий)
+
+        Args:
+            wake (bool): Прервать паузу между повторами и попробовать отправить сразу
+        """
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if wake:
+            self._wakeup.set()
+        if (self._task is None or self._task.done()) and any(op["state"] == PENDING for op in self._ops):
+            self._task = asyncio.get_running_loop().create_task(self._replay())
+
+    async def _replay(self):
+        """Фоновая отправка операций по порядку"""
+        delay = RETRY_MIN_DELAY
+        while True:
+            op = next((op for op in self._ops if op["state"] == PENDING), None)
+            if op is None:
+                return
+
+            try:
+                await self._apply(op)
+                delay = RETRY_MIN_DELAY
+            except Exception as e:
+                op["attempts"] += 1
+                op["error"] = str(e)
+                op["updated"] = datetime.datetime.now().isoformat()
+                if isinstance(e, CalDAVStatusError) and e.status < 500 and e.status not in (408, 429):
+                    # Сервер отклонил запрос, повтор не поможет
+                    op["state"] = FAILED
+                    self._save()
+                    self._drop_from_index(op)
+                    continue
+                self._save()
+                # Ждем паузу или новую операцию (новая операция - повод попробовать раньше)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                delay = min(delay * 2, RETRY_MAX_DELAY)
+
+    async def _apply(self, op: Dict[str, Any]):
+        """Отправить одну операцию на сервер и обновить ее состояние"""
+        if op["op"] == "create":
+            created, etag = await self.calendar._run_caldav(
+                self.calendar._put_new_event_etag, op["uid"], op["ical"])
+            # UID уникален, поэтому уже существующий объект - результат нашей прошлой попытки
+            if created:
+                self._remember_etag(op["uid"], etag)
+            if self.calendar.day_index:
+                self.calendar.day_index.confirm(op["uid"])
+            self._complete(op)
+        else:
+            status = await self.calendar._run_caldav(
+                self.calendar._delete_event_object, op["uid"], op.get("expected_etag"))
+            if status == "conflict":
+                self._finish(op, CONFLICT, "Событие изменено в другом клиенте, удаление не выполнено")
+            elif status == "not_found":
+                # Удалено в другом клиенте или UID указан неверно: сообщаем об этом в состоянии
+                self._finish(op, NOT_FOUND, "Событие не найдено в календаре")
+            else:
+                self._complete(op)
+
+    def _finish(self, op: Dict[str, Any], state: str, error: str):
+        """Оставить операцию в очереди с итоговым состоянием, чтобы сообщить о нем"""
+        op["state"] = state
+        op["error"] = error
+        op["updated"] = datetime.datetime.now().isoformat()
+        self._save()
+
+    def _drop_from_index(self, op: Dict[str, Any]):
+        """Убрать из индекса по дням результат операции, которая не будет выполнена"""
+        day_index = self.calendar.day_index
+        if not day_index:
+            return
+        if op["op"] == "create":
+            day_index.remove(op["uid"])
+        else:
+            # Событие осталось на сервере: индекс загрузит его заново
+            day_index.invalidate()
+
+    def _remember_etag(self, event_uid: str, etag: Optional[str]):
+        """Запомнить ETag созданного объекта для будущего удаления этого события"""
+        if not etag:
+            return
+        for op in self._ops:
+            if op["op"] == "delete" and op["uid"] == event_uid and op["state"] == PENDING:
+                op["expected_etag"] = etag
+                return
+        self._etags[event_uid] = etag
+        while len(self._etags) > MAX_REMEMBERED_ETAGS:
+            del self._etags[next(iter(self._etags))]
+
+    def forget_etag(self, event_uid: str):
+        """Забыть ETag события, измененного в обход очереди (иначе удаление сочтет это конфликтом)"""
+        if self._etags.pop(event_uid, None):
+            self._save()
+
+    def _complete(self, op: Dict[str, Any]):
+        self._ops.remove(op)
+        self.completed += 1
+        self._save()
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Неотправленные операции по порядку"""
+        return [op for op in self._ops if op["state"] == PENDING]
+
+    def apply_overlay(self, events: List[Dict[str, Any]], start: datetime.datetime,
+                      end: datetime.datetime) -> List[Dict[str, Any]]:
+        """
+        Учесть неотправленные операции в списке событий с сервера
+
+        Args:
+            events: События с сервера (формат _parse_ical_event)
+            start, end: Период, за который получены события
+
+        Returns:
+            List[Dict[str, Any]]: События с учетом очереди
+        """
+        if not self._ops:
+            return events
+
+        visible: Dict[str, Optional[Dict[str, Any]]] = {}
+        for op in self.pending():
+            if op["op"] == "delete":
+                visible[op["uid"]] = None
+            else:
+                event = self.calendar._parse_ical_event(op["ical"])
+                event_start = event.get('start_time', '')
+                event_end = event.get('end_time', event_start)
+                if event_end >= start.isoformat() and event_start < end.isoformat():
+                    event["pending"] = True
+                    visible[op["uid"]] = event
+                else:
+                    visible.pop(op["uid"], None)
+
+        result = [event for event in events if event.get('uid') not in visible]
+        result += [event for event in visible.values() if event]
+        return result
+
+    def status(self, clear_finished: bool = False) -> Dict[str, Any]:
+        """
+        Состояние очереди
+
+        Args:
+            clear_finished (bool): Убрать из очереди операции с конфликтом, ошибкой
+                или не найденным событием после того, как о них сообщено
+
+        Returns:
+            Dict[str, Any]: Счетчики и список неотправленных/проблемных операций
+        """
+        report = {
+            "pending": sum(op["state"] == PENDING for op in self._ops),
+            "conflicts": sum(op["state"] == CONFLICT for op in self._ops),
+            "failed": sum(op["state"] == FAILED for op in self._ops),
+            "not_found": sum(op["state"] == NOT_FOUND for op in self._ops),
+            "completed_since_start": self.completed,
+            "operations": [
+                {key: op.get(key) for key in ("op", "uid", "state", "attempts", "error", "enqueued", "updated")}
+                for op in self._ops
+            ],
+        }
+        if clear_finished:
+            self._ops = [op for op in self._ops if op["state"] == PENDING]
+            self._save()
+        return report
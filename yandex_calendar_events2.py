@@ -9,12 +9,15 @@
 2. Создание новых событий в календаре
 3. Получение списка предстоящих событий в текстовом или JSON формате
 4. Удаление событий по их уникальному идентификатору (UID)
-5. Парсинг и форматирование данных iCal
+5. Создание повторяющихся событий (RRULE), отмену и изменение
+   отдельных повторений (EXDATE / RECURRENCE-ID)
+6. Приглашение участников и запрос их занятости (free/busy)
+7. Парсинг и форматирование данных iCal
 
 Требования:
 - Учетная запись Яндекс
 - Пароль приложения (создается на странице https://id.yandex.ru/security/app-passwords)
-- Установленные зависимости (caldav, bs4, httpx)
+- Установленные зависимости (caldav)
 
 Пример использования:
     calendar = YandexCalendarEvents(
@@ -36,28 +39,164 @@
 Лицензия: MIT
 """
 
-import httpx
 import re
+import os
+import sys
 import json
+import time
+import uuid
+import asyncio
 import datetime
+import threading
+import xml.etree.ElementTree as ET
 from typing import List, Dict, Any, Optional, Tuple, Union
-from bs4 import BeautifulSoup
-import caldav
-from caldav.elements import dav
+
+from day_index import DayIndex
+from tool_profiler import profile_thread_call
+
+# caldav импортируется при первом подключении (см. _init_caldav): сервер
+# перезапускается на каждую сессию клиента и должен отвечать на рукопожатие
+# MCP как можно быстрее
+
+# Сколько хранить записи таблицы идемпотентности (повторы приходят в пределах минут)
+IDEMPOTENCY_TTL = datetime.timedelta(hours=24)
+
+# Допустимые частоты повторения (RFC 5545, FREQ)
+RRULE_FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+RRULE_WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+# Свойства серии, которые не переносятся в переопределение одного повторения
+SERIES_ONLY_PROPERTIES = ("RRULE", "RDATE", "EXRULE", "EXDATE", "DTSTART", "DTEND",
+                          "DURATION", "SEQUENCE", "RECURRENCE-ID")
+
+# Сколько хранить занятость участника: повторные запросы при подборе времени
+# встречи идут один за другим, а расписание за минуты меняется редко
+FREEBUSY_CACHE_TTL = 300
+
+# Сколько запросов CalDAV одного аккаунта может выполняться одновременно.
+# Яндекс отвечает 429 на всплески параллельных запросов
+DEFAULT_MAX_CONCURRENCY = 4
+
+# Через сколько секунд повторить неудачное подключение к календарю
+# (Яндекс мог быть временно недоступен при первом обращении)
+CONNECT_RETRY_INTERVAL = 30
+
+CALDAV_NS = "urn:ietf:params:xml:ns:caldav"
+DAV_NS = "DAV:"
+
+
+class CalDAVStatusError(Exception):
+    """Сервер CalDAV ответил неожиданным HTTP-статусом"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
 
 class YandexCalendarEvents:
+    # Ограничители параллельных запросов, общие для всех экземпляров одного аккаунта
+    _account_limits: Dict[Tuple[str, str], asyncio.Semaphore] = {}
+    _account_concurrency: Dict[Tuple[str, str], int] = {}
+
     def __init__(self, caldav_url: str = None,
-                 username: str = None, password: str = None):
+                 username: str = None, password: str = None,
+                 idempotency_file: str = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 day_index_days: int = 14,
+                 day_index_ttl: float = 120):
         self.caldav_url = caldav_url
         self.username = username
         self.password = password
+        account = (caldav_url or "", username or "")
+        if account not in self._account_limits:
+            self._account_limits[account] = asyncio.Semaphore(max(1, max_concurrency))
+            self._account_concurrency[account] = max(1, max_concurrency)
+        self._caldav_limit = self._account_limits[account]
+        # Фактический предел одновременных запросов аккаунта (задает первый экземпляр)
+        self.max_concurrency = self._account_concurrency[account]
+        # Выполняющиеся запросы: ключ запроса -> задача (для объединения одинаковых запросов)
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
         self.caldav_client = None
-        self.caldav_calendar = None
-        if caldav_url and username and password:
-            self._init_caldav()
+        self.caldav_principal = None
+        self._caldav_calendar = None
+        # Подключение выполняется при первом обращении к caldav_calendar,
+        # неудачное повторяется не чаще раза в CONNECT_RETRY_INTERVAL секунд
+        self._connect_pending = bool(caldav_url and username and password)
+        self._connect_retry_at = 0.0
+        self._connect_lock = threading.Lock()
+        self._schedule_outbox_url = None
+        # Кэш занятости: email -> (время получения, начало, конец, список занятых интервалов)
+        self._freebusy_cache = {}
+        # Очередь записи с фоновой отправкой (см. enable_write_queue)
+        self.write_queue = None
+        # Индекс событий по дням для запросов на ближайшие дни (0 дней - без индекса)
+        self.day_index = DayIndex(day_index_days, day_index_ttl) if day_index_days > 0 else None
+        # Таблица идемпотентности: ключ клиента -> {"uid", "result", "created"}
+        self.idempotency_file = idempotency_file
+        self._idempotency = self._load_idempotency()
+
+    @property
+    def caldav_calendar(self):
+        """
+        Календарь CalDAV (подключение выполняется при первом обращении) или None
+
+        Подключение - несколько запросов к серверу, поэтому в асинхронном коде
+        вместо этого свойства используйте ensure_connected.
+        """
+        self._connect()
+        return self._caldav_calendar
+
+    @caldav_calendar.setter
+    def caldav_calendar(self, calendar):
+        self._connect_pending = False
+        self._caldav_calendar = calendar
+
+    def _connect_due(self) -> bool:
+        """Нужно ли (снова) попытаться подключиться к календарю"""
+        return self._connect_pending and time.monotonic() >= self._connect_retry_at
+
+    def _connect(self):
+        """Подключиться к календарю, если подключение еще не выполнялось (синхронно)"""
+        if self._connect_due():
+            with self._connect_lock:
+                if self._connect_due():
+                    self._init_caldav()
+                    if self._caldav_calendar is not None:
+                        self._connect_pending = False
+                    else:
+                        self._connect_retry_at = time.monotonic() + CONNECT_RETRY_INTERVAL
+
+    async def ensure_connected(self) -> bool:
+        """
+        Подключиться к календарю в отдельном потоке, не блокируя цикл событий
+
+        Returns:
+            bool: Есть ли подключение к календарю
+        """
+        if self.write_queue:
+            # Операции, оставшиеся с прошлого запуска, отправляются с первого же вызова
+            self.write_queue.ensure_running(wake=False)
+        if self._connect_due():
+            await asyncio.to_thread(profile_thread_call(self._connect))
+        return self._caldav_calendar is not None
+
+    async def ensure_writable(self) -> bool:
+        """
+        Можно ли принять создание или удаление события
+
+        С очередью записи операция принимается и без подключения: очередь
+        подключится к календарю сама, когда будет отправлять ее на сервер.
+
+        Returns:
+            bool: Можно ли принять запись
+        """
+        if self.write_queue and self.caldav_url and self.username and self.password:
+            return True
+        return await self.ensure_connected()
 
     def _init_caldav(self):
         """Инициализация CalDAV клиента"""
+        import caldav
         try:
             # Создаем клиента с учетными данными
             self.caldav_client = caldav.DAVClient(
@@ -68,6 +207,7 @@ class YandexCalendarEvents:
             
             # Получаем principal (основной календарь)
             principal = self.caldav_client.principal()
+            self.caldav_principal = principal
             
             # Получаем все доступные календари
             calendars = principal.calendars()
@@ -76,13 +216,706 @@ class YandexCalendarEvents:
                 raise Exception("No calendars found")
                 
             # Используем первый доступный календарь
-            self.caldav_calendar = calendars[0]
-            print(f"Successfully connected to calendar: {self.caldav_calendar.name}")
+            self._caldav_calendar = calendars[0]
+            # stdout занят протоколом MCP (stdio), поэтому диагностика - в stderr
+            print(f"Successfully connected to calendar: {self._caldav_calendar.name}", file=sys.stderr)
             
         except Exception as e:
-            print(f"CalDAV Error: {str(e)}")
+            print(f"CalDAV Error: {str(e)}", file=sys.stderr)
             self.caldav_client = None
-            self.caldav_calendar = None
+            self.caldav_principal = None
+            self._caldav_calendar = None
+
+    def enable_write_queue(self, path: str):
+        """
+        Включить очередь записи: создание и удаление событий подтверждаются сразу,
+        а на сервер отправляются в фоне (см. write_queue.py)
+
+        Args:
+            path (str): Файл для хранения очереди
+        """
+        from write_queue import WriteQueue
+        self.write_queue = WriteQueue(self, path)
+
+    async def _run_caldav(self, func, *args):
+        """
+        Выполнить синхронную операцию CalDAV в отдельном потоке
+
+        Число одновременных запросов аккаунта ограничено семафором,
+        лишние запросы ждут своей очереди, не занимая потоки.
+        Если подключение к календарю еще не выполнялось, оно выполняется сначала.
+        """
+        if not await self.ensure_connected():
+            raise ConnectionError("нет подключения к Яндекс Календарю")
+        async with self._caldav_limit:
+            return await asyncio.to_thread(profile_thread_call(func), *args)
+
+    async def _coalesce(self, key: Tuple, func, *args):
+        """
+        Выполнить запрос, объединяя одинаковые одновременные вызовы (single-flight)
+
+        Если запрос с тем же ключом уже выполняется, новый вызов не идет
+        на сервер, а дожидается результата выполняющегося.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run_caldav(func, *args))
+            self._inflight[key] = task
+
+            def _forget(_, key=key, task=task):
+                if self._inflight.get(key) is task:
+                    del self._inflight[key]
+
+            task.add_done_callback(_forget)
+        # shield: отмена одного из ожидающих не должна отменять общий запрос
+        return await asyncio.shield(task)
+
+    def _load_idempotency(self) -> Dict[str, Dict[str, Any]]:
+        """Загрузка таблицы идемпотентности из файла (если он задан)"""
+        if not self.idempotency_file or not os.path.exists(self.idempotency_file):
+            return {}
+        try:
+            with open(self.idempotency_file, encoding='utf-8') as f:
+                table = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Не удалось прочитать таблицу идемпотентности: {str(e)}", file=sys.stderr)
+            return {}
+        return self._prune_idempotency(table)
+
+    def _save_idempotency(self):
+        """Атомарная запись таблицы идемпотентности в файл"""
+        if not self.idempotency_file:
+            return
+        tmp_path = f"{self.idempotency_file}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._idempotency, f, ensure_ascii=False)
+            os.replace(tmp_path, self.idempotency_file)
+        except OSError as e:
+            print(f"Не удалось сохранить таблицу идемпотентности: {str(e)}", file=sys.stderr)
+
+    @staticmethod
+    def _prune_idempotency(table: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Удаление устаревших записей из таблицы идемпотентности"""
+        threshold = (datetime.datetime.now() - IDEMPOTENCY_TTL).isoformat()
+        return {key: entry for key, entry in table.items()
+                if entry.get('created', '') >= threshold}
+
+    def _new_event_uid(self, idempotency_key: Optional[str] = None) -> str:
+        """
+        Сформировать UID нового события
+
+        Без ключа идемпотентности используется случайный UUID4. С ключом -
+        детерминированный UUID5, поэтому повтор того же вызова (даже после
+        перезапуска сервера) попадает в тот же объект и отсекается If-None-Match.
+        """
+        if idempotency_key:
+            return f"{uuid.uuid5(uuid.NAMESPACE_URL, f'{self.username}:{idempotency_key}')}@yandex.ru"
+        return f"{uuid.uuid4()}@yandex.ru"
+
+    def _object_url(self, event_uid: str) -> str:
+        """
+        Адрес объекта события в календаре
+
+        UID из сторонних файлов может содержать символы, недопустимые в пути
+        (например, "/"), для таких UID имя файла строится из хэша UID.
+        """
+        if re.fullmatch(r'[A-Za-z0-9@._-]+', event_uid):
+            name = event_uid
+        else:
+            name = str(uuid.uuid5(uuid.NAMESPACE_URL, event_uid))
+        return str(self.caldav_calendar.url.join(f"{name}.ics"))
+
+    def _put_new_event(self, event_uid: str, ical: str) -> bool:
+        """
+        Создать объект события условным PUT (If-None-Match: *)
+
+        Выполняется синхронно, вызывать из отдельного потока.
+
+        Returns:
+            bool: True, если объект создан, False, если объект с таким UID уже существует
+        """
+        return self._put_new_event_etag(event_uid, ical)[0]
+
+    def _put_new_event_etag(self, event_uid: str, ical: str) -> Tuple[bool, Optional[str]]:
+        """
+        То же, что _put_new_event, но дополнительно возвращает ETag созданного объекта
+
+        Returns:
+            Tuple[bool, Optional[str]]: (создан ли объект, ETag или None)
+        """
+        response = self.caldav_client.put(
+            self._object_url(event_uid), ical,
+            {"Content-Type": "text/calendar; charset=utf-8", "If-None-Match": "*"}
+        )
+        if response.status == 412:
+            return False, None
+        if response.status not in (200, 201, 204):
+            raise CalDAVStatusError(response.status, f"CalDAV PUT вернул статус {response.status} {response.reason}")
+        return True, response.headers.get('ETag')
+
+    def _fetch_event_object(self, event_uid: str) -> Optional[Tuple[str, str, Optional[str]]]:
+        """
+        Получить сырой объект события вместе с его ETag
+
+        Сначала пробует адрес {uid}.ics, по которому события создает этот модуль,
+        и только если его нет - ищет объект по UID через REPORT.
+        Выполняется синхронно, вызывать из отдельного потока.
+
+        Returns:
+            Optional[Tuple[str, str, Optional[str]]]: (url, данные iCal, ETag) или None
+        """
+        url = self._object_url(event_uid)
+        response = self.caldav_client.request(url)
+        if response.status == 404:
+            from caldav.lib.error import NotFoundError
+            try:
+                event = self.caldav_calendar.object_by_uid(event_uid)
+            except NotFoundError:
+                return None
+            url = str(event.url)
+            response = self.caldav_client.request(url)
+        if response.status != 200:
+            raise CalDAVStatusError(response.status, f"CalDAV GET вернул статус {response.status} {response.reason}")
+        return url, response.raw, response.headers.get('ETag')
+
+    def _put_existing_event(self, url: str, ical: str, etag: Optional[str]) -> bool:
+        """
+        Перезаписать объект события условным PUT (If-Match: ETag)
+
+        Выполняется синхронно, вызывать из отдельного потока.
+
+        Returns:
+            bool: True при успехе, False, если объект изменился с момента чтения
+        """
+        headers = {"Content-Type": "text/calendar; charset=utf-8"}
+        if etag:
+            headers["If-Match"] = etag
+        response = self.caldav_client.put(url, ical, headers)
+        if response.status == 412:
+            return False
+        if response.status not in (200, 201, 204):
+            raise CalDAVStatusError(response.status, f"CalDAV PUT вернул статус {response.status} {response.reason}")
+        return True
+
+    @classmethod
+    def _merge_components(cls, ical: str, extra_ical: str) -> Optional[str]:
+        """
+        Дописать в объект VEVENT из другого объекта с тем же UID
+
+        Переносятся только VEVENT с новым RECURRENCE-ID (или основной VEVENT,
+        если его еще нет) и недостающие VTIMEZONE.
+
+        Returns:
+            Optional[str]: Новый текст объекта или None, если добавлять нечего
+        """
+        props = cls._ical_properties(ical)
+        extra = cls._ical_properties(extra_ical)
+
+        def recurrence_key(items: List[str], begin: int, end: int) -> Optional[str]:
+            prop = cls._find_property(items, begin, end, 'RECURRENCE-ID')
+            return prop.split(':', 1)[1].strip() if prop else None
+
+        existing = {recurrence_key(props, begin, end) for begin, end in cls._vevent_blocks(props)}
+        added = []
+        for begin, end in cls._vevent_blocks(extra):
+            key = recurrence_key(extra, begin, end)
+            if key not in existing:
+                existing.add(key)
+                added += extra[begin:end + 1]
+        if not added:
+            return None
+
+        # Часовые пояса, на которые могут ссылаться новые VEVENT
+        tzids = {prop.split(':', 1)[1].strip() for prop in props if cls._property_name(prop) == 'TZID'}
+        begin = None
+        for i, prop in enumerate(extra):
+            if prop.upper() == 'BEGIN:VTIMEZONE':
+                begin = i
+            elif prop.upper() == 'END:VTIMEZONE' and begin is not None:
+                tzid = cls._find_property(extra, begin, i, 'TZID')
+                if tzid and tzid.split(':', 1)[1].strip() not in tzids:
+                    added = extra[begin:i + 1] + added
+                begin = None
+
+        end_index = max(i for i, prop in enumerate(props) if prop.upper() == 'END:VCALENDAR')
+        return '\r\n'.join(props[:end_index] + added + props[end_index:]) + '\r\n'
+
+    def _add_components(self, event_uid: str, ical: str) -> str:
+        """
+        Дописать в существующий объект события VEVENT из ical условным PUT (If-Match)
+
+        Выполняется синхронно, вызывать из отдельного потока.
+
+        Returns:
+            str: "ok", "unchanged" (все компоненты уже есть), "not_found" или "conflict"
+        """
+        for _ in range(3):
+            fetched = self._fetch_event_object(event_uid)
+            if not fetched:
+                return "not_found"
+            url, current, etag = fetched
+            merged = self._merge_components(current, ical)
+            if merged is None:
+                return "unchanged"
+            if self._put_existing_event(url, merged, etag):
+                return "ok"
+        return "conflict"
+
+    def _update_event_object(self, event_uid: str, edit) -> str:
+        """
+        Изменить объект события функцией edit(ical) -> ical одним условным PUT
+
+        При конфликте (объект изменен параллельно) чтение и запись повторяются.
+        Выполняется синхронно, вызывать из отдельного потока.
+
+        Returns:
+            str: "ok", "not_found" или "conflict"
+        """
+        for _ in range(3):
+            fetched = self._fetch_event_object(event_uid)
+            if not fetched:
+                return "not_found"
+            url, ical, etag = fetched
+            if self._put_existing_event(url, edit(ical), etag):
+                return "ok"
+        return "conflict"
+
+    def _delete_event_object(self, event_uid: str, expected_etag: Optional[str] = None) -> str:
+        """
+        Удалить объект события условным DELETE (If-Match: ETag)
+
+        Если передан expected_etag, а объект на сервере уже другой (изменен
+        в другом клиенте), объект не удаляется.
+        Выполняется синхронно, вызывать из отдельного потока.
+
+        Returns:
+            str: "ok", "not_found" или "conflict"
+        """
+        fetched = self._fetch_event_object(event_uid)
+        if not fetched:
+            return "not_found"
+        url, _, etag = fetched
+        if expected_etag and etag and etag != expected_etag:
+            return "conflict"
+        headers = {"If-Match": etag} if etag else {}
+        response = self.caldav_client.request(url, "DELETE", "", headers)
+        if response.status == 412:
+            return "conflict"
+        if response.status == 404:
+            return "not_found"
+        if response.status not in (200, 204):
+            raise CalDAVStatusError(response.status, f"CalDAV DELETE вернул статус {response.status} {response.reason}")
+        return "ok"
+
+    @staticmethod
+    def build_rrule(frequency: str, interval: int = 1, count: Optional[int] = None,
+                    until: Optional[datetime.datetime] = None,
+                    by_day: Optional[List[str]] = None) -> str:
+        """
+        Сформировать правило повторения RRULE
+
+        Args:
+            frequency (str): Частота: DAILY, WEEKLY, MONTHLY или YEARLY
+            interval (int): Интервал повторения. По умолчанию: 1
+            count (int, optional): Количество повторений
+            until (datetime.datetime, optional): Дата последнего повторения
+            by_day (List[str], optional): Дни недели (MO, TU, ...)
+
+        Returns:
+            str: Значение RRULE, например "FREQ=WEEKLY;COUNT=10;BYDAY=MO"
+        """
+        frequency = frequency.upper()
+        if frequency not in RRULE_FREQUENCIES:
+            raise ValueError(f"Неизвестная частота повторения: {frequency}. "
+                             f"Допустимо: {', '.join(RRULE_FREQUENCIES)}")
+        if count and until:
+            raise ValueError("Нельзя одновременно указывать количество повторений и дату окончания")
+
+        parts = [f"FREQ={frequency}"]
+        if interval and interval > 1:
+            parts.append(f"INTERVAL={interval}")
+        if count:
+            parts.append(f"COUNT={count}")
+        if until:
+            parts.append(f"UNTIL={until.strftime('%Y%m%dT%H%M%S')}")
+        if by_day:
+            days = [day.strip().upper() for day in by_day if day.strip()]
+            unknown = [day for day in days if day not in RRULE_WEEKDAYS]
+            if unknown:
+                raise ValueError(f"Неизвестные дни недели: {', '.join(unknown)}")
+            parts.append(f"BYDAY={','.join(days)}")
+        return ";".join(parts)
+
+    @staticmethod
+    def _ical_properties(ical: str) -> List[str]:
+        """Разбить iCal на свойства, сохраняя перенесенные строки (folding) вместе"""
+        props = []
+        for line in ical.splitlines():
+            if line[:1] in (' ', '\t') and props:
+                props[-1] += '\r\n' + line
+            elif line:
+                props.append(line)
+        return props
+
+    @staticmethod
+    def _property_name(prop: str) -> str:
+        """Имя свойства iCal без параметров (DTSTART;TZID=...:... -> DTSTART)"""
+        return prop.split(':', 1)[0].split(';', 1)[0].upper()
+
+    @classmethod
+    def _vevent_blocks(cls, props: List[str]) -> List[Tuple[int, int]]:
+        """Индексы (BEGIN:VEVENT, END:VEVENT) всех компонентов VEVENT"""
+        blocks = []
+        begin = None
+        for i, prop in enumerate(props):
+            if prop.upper() == 'BEGIN:VEVENT':
+                begin = i
+            elif prop.upper() == 'END:VEVENT' and begin is not None:
+                blocks.append((begin, i))
+                begin = None
+        return blocks
+
+    @classmethod
+    def _master_vevent(cls, props: List[str]) -> Tuple[int, int]:
+        """Границы основного VEVENT серии (без RECURRENCE-ID)"""
+        for begin, end in cls._vevent_blocks(props):
+            names = [cls._property_name(prop) for prop in props[begin + 1:end]]
+            if 'RECURRENCE-ID' not in names:
+                if 'RRULE' not in names and 'RDATE' not in names:
+                    raise ValueError("Событие не является повторяющимся")
+                return begin, end
+        raise ValueError("В объекте нет основного события серии")
+
+    @classmethod
+    def _find_property(cls, props: List[str], begin: int, end: int, name: str) -> Optional[str]:
+        for prop in props[begin + 1:end]:
+            if cls._property_name(prop) == name:
+                return prop
+        return None
+
+    @staticmethod
+    def _format_like(dtstart_prop: str, moment: datetime.datetime) -> Tuple[str, str]:
+        """
+        Отформатировать момент времени так же, как DTSTART серии
+
+        EXDATE и RECURRENCE-ID должны совпадать с DTSTART по типу значения
+        и часовому поясу, иначе сервер не сопоставит их с повторением.
+
+        Returns:
+            Tuple[str, str]: (параметры свойства, значение), например (";TZID=Europe/Moscow", "20250515T140000")
+        """
+        head, value = dtstart_prop.split(':', 1)
+        params = head[len('DTSTART'):]
+        if 'VALUE=DATE' in params.upper() and 'VALUE=DATE-TIME' not in params.upper():
+            return params, moment.strftime('%Y%m%d')
+        if value.strip().upper().endswith('Z'):
+            moment = moment.astimezone(datetime.timezone.utc)
+            return params, moment.strftime('%Y%m%dT%H%M%SZ')
+        return params, moment.strftime('%Y%m%dT%H%M%S')
+
+    @staticmethod
+    def _ical_value_to_datetime(prop: Optional[str]) -> Optional[datetime.datetime]:
+        if not prop:
+            return None
+        value = prop.split(':', 1)[1].strip()
+        try:
+            if len(value) == 8:
+                return datetime.datetime.strptime(value, '%Y%m%d')
+            return datetime.datetime.strptime(value[:15], '%Y%m%dT%H%M%S')
+        except ValueError:
+            return None
+
+    @classmethod
+    def _drop_override(cls, props: List[str], recurrence_value: str) -> List[str]:
+        """Удалить переопределение повторения с указанным RECURRENCE-ID (если есть)"""
+        for begin, end in cls._vevent_blocks(props):
+            recurrence_id = cls._find_property(props, begin, end, 'RECURRENCE-ID')
+            if recurrence_id and recurrence_id.split(':', 1)[1].strip() == recurrence_value:
+                return props[:begin] + props[end + 1:]
+        return props
+
+    @classmethod
+    def _check_occurrence(cls, ical: str, props: List[str], recurrence_value: str,
+                          occurrence_start: datetime.datetime):
+        """
+        Убедиться, что в серии есть повторение с таким исходным началом
+
+        Иначе EXDATE ничего не отменит, а RECURRENCE-ID добавит лишнее событие.
+        Отмененные (EXDATE) повторения не считаются, уже измененные - считаются.
+
+        Raises:
+            ValueError: Такого повторения нет
+        """
+        import icalendar
+        import recurring_ical_events
+
+        # Измененное повторение могло быть перенесено далеко от исходного времени
+        for begin, end in cls._vevent_blocks(props):
+            recurrence_id = cls._find_property(props, begin, end, 'RECURRENCE-ID')
+            if recurrence_id and recurrence_id.split(':', 1)[1].strip() == recurrence_value:
+                return
+
+        # Окно с запасом на разницу часовых поясов серии и сервера
+        window = datetime.timedelta(days=2)
+        occurrences = recurring_ical_events.of(icalendar.Calendar.from_ical(ical)).between(
+            occurrence_start - window, occurrence_start + window)
+        for component in occurrences:
+            moment = (component.get('RECURRENCE-ID') or component['DTSTART']).dt
+            if not isinstance(moment, datetime.datetime):
+                candidate = moment.strftime('%Y%m%d')
+            elif recurrence_value.endswith('Z') and moment.tzinfo:
+                candidate = moment.astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+            else:
+                candidate = moment.strftime('%Y%m%dT%H%M%S')
+            if candidate == recurrence_value:
+                return
+        raise ValueError(f"В серии нет повторения, начинающегося {occurrence_start.strftime('%d.%m.%Y %H:%M')}")
+
+    @classmethod
+    def _add_exdate(cls, ical: str, occurrence_start: datetime.datetime) -> str:
+        """Исключить одно повторение серии (EXDATE)"""
+        props = cls._ical_properties(ical)
+        begin, end = cls._master_vevent(props)
+        params, value = cls._format_like(cls._find_property(props, begin, end, 'DTSTART'),
+                                         occurrence_start)
+        cls._check_occurrence(ical, props, value, occurrence_start)
+        props = cls._drop_override(props, value)
+        begin, end = cls._master_vevent(props)
+        props.insert(end, f"EXDATE{params}:{value}")
+        return '\r\n'.join(props) + '\r\n'
+
+    @classmethod
+    def _add_override(cls, ical: str, occurrence_start: datetime.datetime,
+                      start: Optional[datetime.datetime] = None,
+                      end: Optional[datetime.datetime] = None,
+                      title: Optional[str] = None,
+                      description: Optional[str] = None) -> str:
+        """Изменить одно повторение серии (VEVENT с RECURRENCE-ID)"""
+        props = cls._ical_properties(ical)
+        master_begin, master_end = cls._master_vevent(props)
+        dtstart = cls._find_property(props, master_begin, master_end, 'DTSTART')
+        params, recurrence_value = cls._format_like(dtstart, occurrence_start)
+        cls._check_occurrence(ical, props, recurrence_value, occurrence_start)
+
+        # Длительность повторения берем из серии
+        series_start = cls._ical_value_to_datetime(dtstart)
+        series_end = cls._ical_value_to_datetime(
+            cls._find_property(props, master_begin, master_end, 'DTEND'))
+        duration = (series_end - series_start) if series_start and series_end \
+            else datetime.timedelta(hours=1)
+        start = start or occurrence_start
+        end = end or start + duration
+
+        skipped = set(SERIES_ONLY_PROPERTIES) | {'DTSTAMP'}
+        if title is not None:
+            skipped.add('SUMMARY')
+        if description is not None:
+            skipped.add('DESCRIPTION')
+
+        override = ['BEGIN:VEVENT']
+        override += [prop for prop in props[master_begin + 1:master_end]
+                     if cls._property_name(prop) not in skipped]
+        override.append(f"DTSTAMP:{datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')}")
+        override.append(f"RECURRENCE-ID{params}:{recurrence_value}")
+        override.append(f"DTSTART{params}:{cls._format_like(dtstart, start)[1]}")
+        override.append(f"DTEND{params}:{cls._format_like(dtstart, end)[1]}")
+        if title is not None:
+            override.append(f"SUMMARY:{title}")
+        if description is not None:
+            override.append(f"DESCRIPTION:{description}")
+        override.append('END:VEVENT')
+
+        props = cls._drop_override(props, recurrence_value)
+        calendar_end = max(i for i, prop in enumerate(props) if prop.upper() == 'END:VCALENDAR')
+        props[calendar_end:calendar_end] = override
+        return '\r\n'.join(props) + '\r\n'
+
+    @staticmethod
+    def _parse_ical_duration(value: str) -> datetime.timedelta:
+        """Разбор длительности iCal (P1D, PT1H30M, ...)"""
+        days = 0
+        seconds = 0
+        number = ''
+        in_time = False
+        for char in value.lstrip('+').lstrip('P'):
+            if char == 'T':
+                in_time = True
+            elif char.isdigit():
+                number += char
+            else:
+                amount = int(number or 0)
+                number = ''
+                if char == 'W':
+                    days += amount * 7
+                elif char == 'D':
+                    days += amount
+                elif char == 'H' and in_time:
+                    seconds += amount * 3600
+                elif char == 'M' and in_time:
+                    seconds += amount * 60
+                elif char == 'S' and in_time:
+                    seconds += amount
+        return datetime.timedelta(days=days, seconds=seconds)
+
+    @classmethod
+    def _parse_freebusy_periods(cls, calendar_data: str) -> List[Tuple[datetime.datetime, datetime.datetime]]:
+        """
+        Извлечь занятые интервалы из ответа VFREEBUSY
+
+        Интервалы возвращаются в локальном времени (без часового пояса),
+        как и остальные даты в этом модуле.
+        """
+        periods = []
+        for prop in cls._ical_properties(calendar_data):
+            prop = prop.replace('\r\n ', '').replace('\r\n\t', '')
+            if cls._property_name(prop) != 'FREEBUSY':
+                continue
+            head, value = prop.split(':', 1)
+            if 'FBTYPE=FREE' in head.upper():
+                continue
+            for period in value.split(','):
+                period_start, _, period_end = period.strip().partition('/')
+                start = datetime.datetime.strptime(period_start[:15], '%Y%m%dT%H%M%S')
+                if period_start.endswith('Z'):
+                    start = start.replace(tzinfo=datetime.timezone.utc).astimezone().replace(tzinfo=None)
+                if period_end.startswith(('P', '+P')):
+                    end = start + cls._parse_ical_duration(period_end)
+                else:
+                    end = datetime.datetime.strptime(period_end[:15], '%Y%m%dT%H%M%S')
+                    if period_end.endswith('Z'):
+                        end = end.replace(tzinfo=datetime.timezone.utc).astimezone().replace(tzinfo=None)
+                periods.append((start, end))
+        periods.sort()
+        return periods
+
+    def _query_free_busy(self, attendees: List[str], start: datetime.datetime,
+                         end: datetime.datetime) -> Dict[str, Dict[str, Any]]:
+        """
+        Запросить занятость сразу всех участников одним POST в schedule-outbox (RFC 6638)
+
+        Выполняется синхронно, вызывать из отдельного потока.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: email -> {"busy": [(начало, конец)], "status": код ответа}
+        """
+        if not self._schedule_outbox_url:
+            self._schedule_outbox_url = str(self.caldav_principal.schedule_outbox().url)
+
+        utc_format = '%Y%m%dT%H%M%SZ'
+        lines = [
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            "PRODID:-//yandex-calendar-mcp//RU",
+            "METHOD:REQUEST",
+            "BEGIN:VFREEBUSY",
+            f"UID:{uuid.uuid4()}",
+            f"DTSTAMP:{datetime.datetime.now(datetime.timezone.utc).strftime(utc_format)}",
+            f"DTSTART:{start.astimezone(datetime.timezone.utc).strftime(utc_format)}",
+            f"DTEND:{end.astimezone(datetime.timezone.utc).strftime(utc_format)}",
+            f"ORGANIZER:mailto:{self.username}",
+        ]
+        lines += [f"ATTENDEE:mailto:{attendee}" for attendee in attendees]
+        lines += ["END:VFREEBUSY", "END:VCALENDAR"]
+
+        response = self.caldav_client.post(
+            self._schedule_outbox_url, "\r\n".join(lines) + "\r\n",
+            {"Content-Type": "text/calendar; charset=utf-8; method=REQUEST"}
+        )
+        if response.status not in (200, 207):
+            raise CalDAVStatusError(response.status, f"CalDAV POST вернул статус {response.status} {response.reason}")
+
+        result = {}
+        root = ET.fromstring(response.raw.encode('utf-8') if isinstance(response.raw, str) else response.raw)
+        for item in root.iter(f"{{{CALDAV_NS}}}response"):
+            href = item.findtext(f"{{{CALDAV_NS}}}recipient/{{{DAV_NS}}}href", default="")
+            email = href.strip()
+            if email.lower().startswith('mailto:'):
+                email = email[len('mailto:'):]
+            status = (item.findtext(f"{{{CALDAV_NS}}}request-status") or "").strip()
+            calendar_data = item.findtext(f"{{{CALDAV_NS}}}calendar-data") or ""
+            result[email.lower()] = {
+                "busy": self._parse_freebusy_periods(calendar_data) if status.startswith("2.") else [],
+                "status": status
+            }
+        return result
+
+    async def get_free_busy(self, attendees: List[str], start: datetime.datetime,
+                            end: datetime.datetime) -> Dict[str, Dict[str, Any]]:
+        """
+        Получить занятость нескольких участников за период
+
+        Недостающие в кэше участники запрашиваются одним общим запросом,
+        результат кэшируется на FREEBUSY_CACHE_TTL секунд для каждого участника.
+
+        Args:
+            attendees (List[str]): Email участников
+            start (datetime.datetime): Начало периода
+            end (datetime.datetime): Конец периода
+
+        Returns:
+            Dict[str, Dict[str, Any]]: email -> {"busy": [(начало, конец)], "status": код ответа}
+        """
+        attendees = [attendee.strip().lower() for attendee in attendees if attendee.strip()]
+        now = time.monotonic()
+        result = {}
+        missing = []
+        for attendee in attendees:
+            cached = self._freebusy_cache.get(attendee)
+            if cached and now - cached[0] < FREEBUSY_CACHE_TTL and cached[1] <= start and cached[2] >= end:
+                result[attendee] = {
+                    "busy": [(b_start, b_end) for b_start, b_end in cached[3]
+                             if b_end > start and b_start < end],
+                    "status": "2.0;cached"
+                }
+            else:
+                missing.append(attendee)
+
+        if missing:
+            fetched = await self._coalesce(("freebusy", tuple(missing), start, end),
+                                           self._query_free_busy, missing, start, end)
+            for attendee in missing:
+                info = fetched.get(attendee, {"busy": [], "status": "3.7;Invalid calendar user"})
+                if info["status"].startswith("2."):
+                    self._freebusy_cache[attendee] = (now, start, end, info["busy"])
+                result[attendee] = info
+        return result
+
+    @staticmethod
+    def find_common_free_slots(busy: List[Tuple[datetime.datetime, datetime.datetime]],
+                               start: datetime.datetime, end: datetime.datetime,
+                               duration: datetime.timedelta,
+                               day_start: datetime.time = datetime.time(9, 0),
+                               day_end: datetime.time = datetime.time(19, 0)) -> List[Tuple[datetime.datetime, datetime.datetime]]:
+        """
+        Найти общие свободные окна не короче duration в рабочие часы
+
+        Args:
+            busy: Занятые интервалы всех участников вместе
+            start, end: Период поиска
+            duration: Минимальная длительность окна
+            day_start, day_end: Границы рабочего дня
+
+        Returns:
+            List[Tuple[datetime.datetime, datetime.datetime]]: Свободные окна по возрастанию
+        """
+        busy = sorted(busy)
+        slots = []
+        day = start.date()
+        while day <= end.date():
+            window_start = max(start, datetime.datetime.combine(day, day_start))
+            window_end = min(end, datetime.datetime.combine(day, day_end))
+            cursor = window_start
+            for busy_start, busy_end in busy:
+                if busy_end <= cursor or busy_start >= window_end:
+                    continue
+                if busy_start - cursor >= duration:
+                    slots.append((cursor, busy_start))
+                cursor = max(cursor, busy_end)
+            if window_end - cursor >= duration:
+                slots.append((cursor, window_end))
+            day += datetime.timedelta(days=1)
+        return slots
 
     def _parse_ical_event(self, event_data: str) -> Dict[str, Any]:
         """
@@ -95,7 +928,8 @@ class YandexCalendarEvents:
             Dict[str, Any]: Словарь с данными события
         """
         event_dict = {}
-        event_lines = event_data.split('\n')
+        # Склеиваем перенесенные строки (folding, RFC 5545 3.1)
+        event_lines = re.sub(r'\r?\n[ \t]', '', event_data).split('\n')
         
         # Общие поля, которые мы хотим извлечь
         for line in event_lines:
@@ -111,8 +945,13 @@ class YandexCalendarEvents:
             elif line.startswith('DTSTART'):
                 try:
                     date_str = line.split(':')[1]
-                    # Преобразуем дату из формата YYYYMMDDTHHMMSS
-                    dt = datetime.datetime.strptime(date_str[:15], '%Y%m%dT%H%M%S')
+                    if len(date_str) == 8:
+                        # Событие на весь день (VALUE=DATE, формат YYYYMMDD)
+                        dt = datetime.datetime.strptime(date_str, '%Y%m%d')
+                        event_dict['all_day'] = True
+                    else:
+                        # Преобразуем дату из формата YYYYMMDDTHHMMSS
+                        dt = datetime.datetime.strptime(date_str[:15], '%Y%m%dT%H%M%S')
                     event_dict['start_time'] = dt.isoformat()
                     event_dict['start_display'] = dt.strftime('%d.%m.%Y %H:%M')
                 except Exception:
@@ -121,7 +960,10 @@ class YandexCalendarEvents:
             elif line.startswith('DTEND'):
                 try:
                     date_str = line.split(':')[1]
-                    dt = datetime.datetime.strptime(date_str[:15], '%Y%m%dT%H%M%S')
+                    if len(date_str) == 8:
+                        dt = datetime.datetime.strptime(date_str, '%Y%m%d')
+                    else:
+                        dt = datetime.datetime.strptime(date_str[:15], '%Y%m%dT%H%M%S')
                     event_dict['end_time'] = dt.isoformat()
                     event_dict['end_display'] = dt.strftime('%d.%m.%Y %H:%M')
                 except Exception:
@@ -149,6 +991,12 @@ class YandexCalendarEvents:
                 event_dict['status'] = line.replace('STATUS:', '')
             elif line.startswith('TRANSP:'):
                 event_dict['transparency'] = line.replace('TRANSP:', '')
+            elif line.startswith('ATTENDEE'):
+                event_dict.setdefault('attendees', []).append(line.split(':')[-1])
+            elif line.startswith('RRULE:'):
+                event_dict['rrule'] = line.replace('RRULE:', '')
+            elif line.startswith('RECURRENCE-ID'):
+                event_dict['recurrence_id'] = line.split(':')[-1]
             elif line.startswith('SEQUENCE:'):
                 try:
                     event_dict['sequence'] = int(line.replace('SEQUENCE:', ''))
@@ -157,8 +1005,30 @@ class YandexCalendarEvents:
                 
         return event_dict
 
+    def _parse_ical_events(self, event_data: str) -> List[Dict[str, Any]]:
+        """
+        Парсинг всех событий объекта iCal
+
+        Развернутая серия приходит одним объектом с отдельным VEVENT
+        (RECURRENCE-ID) на каждое повторение, каждый VEVENT - отдельное событие.
+
+        Args:
+            event_data (str): Сырые данные объекта в формате iCal
+
+        Returns:
+            List[Dict[str, Any]]: Словари с данными событий
+        """
+        props = self._ical_properties(event_data)
+        blocks = self._vevent_blocks(props)
+        if not blocks:
+            return [self._parse_ical_event(event_data)]
+        return [self._parse_ical_event('\r\n'.join(props[begin:end + 1])) for begin, end in blocks]
+
     async def create_event(self, title: str, start: datetime.datetime, 
-                           end: datetime.datetime, description: str = "") -> str:
+                           end: datetime.datetime, description: str = "",
+                           idempotency_key: Optional[str] = None,
+                           rrule: Optional[str] = None,
+                           attendees: Optional[List[str]] = None) -> str:
         """
         Создать новое событие через CalDAV
         
@@ -167,14 +1037,23 @@ class YandexCalendarEvents:
             start (datetime.datetime): Дата и время начала события
             end (datetime.datetime): Дата и время окончания события
             description (str, optional): Описание события. По умолчанию: ""
+            idempotency_key (str, optional): Ключ идемпотентности клиента. Повторный
+                вызов с тем же ключом не создает дубликат, а возвращает прежний результат.
+            rrule (str, optional): Правило повторения (см. build_rrule). Серия хранится
+                одним объектом, а не отдельным событием на каждое повторение.
+            attendees (List[str], optional): Email участников. Приглашения рассылает
+                сервер календаря, организатором указывается владелец календаря.
             
         Returns:
             str: Сообщение о результате создания события
         """
-        if not self.caldav_calendar:
+        if not await self.ensure_writable():
             return "CalDAV не настроен"
+
+        if idempotency_key and idempotency_key in self._idempotency:
+            return self._idempotency[idempotency_key]['result']
             
-        event_uid = f"{datetime.datetime.now().timestamp()}@yandex.ru"
+        event_uid = self._new_event_uid(idempotency_key)
         ical = f"""BEGIN:VCALENDAR
 VERSION:2.0
 BEGIN:VEVENT
@@ -185,20 +1064,90 @@ DESCRIPTION:{description}
 UID:{event_uid}
 END:VEVENT
 END:VCALENDAR"""
+        if rrule:
+            ical = ical.replace("END:VEVENT", f"RRULE:{rrule}\nEND:VEVENT")
+        if attendees:
+            participants = [f"ORGANIZER:mailto:{self.username}"]
+            participants += [
+                f"ATTENDEE;ROLE=REQ-PARTICIPANT;PARTSTAT=NEEDS-ACTION;RSVP=TRUE:mailto:{attendee.strip()}"
+                for attendee in attendees if attendee.strip()
+            ]
+            ical = ical.replace("END:VEVENT", "\n".join(participants) + "\nEND:VEVENT")
 
-        # Используем блок asyncio для выполнения синхронной операции в асинхронном контексте
-        import asyncio
         try:
-            # Выполняем синхронную операцию в отдельном потоке
-            # чтобы не блокировать основной поток выполнения
-            def _add_event():
-                return self.caldav_calendar.add_event(ical)
-                
-            await asyncio.to_thread(_add_event)
-            return f"Событие '{title}' успешно создано"
+            if self.write_queue:
+                # Событие сохраняется в очередь, на сервер оно уйдет в фоне
+                self.write_queue.enqueue_create(event_uid, ical)
+                result = (f"Событие '{title}' успешно принято (UID: {event_uid}), "
+                          f"сохранение в календаре выполняется в фоне")
+            else:
+                # Выполняем синхронную операцию в отдельном потоке
+                # чтобы не блокировать основной поток выполнения
+                def _add_event():
+                    return self._put_new_event(event_uid, ical)
+
+                created = await self._run_caldav(_add_event)
+                if created:
+                    result = f"Событие '{title}' успешно создано (UID: {event_uid})"
+                else:
+                    # Объект с этим UID уже создан предыдущей попыткой
+                    result = f"Событие '{title}' успешно создано ранее (UID: {event_uid})"
+
+            if self.day_index:
+                if rrule:
+                    # Повторения серии проще получить с сервера, чем разворачивать здесь
+                    self.day_index.invalidate()
+                else:
+                    event = self._parse_ical_event(ical)
+                    if self.write_queue:
+                        event["pending"] = True
+                    self.day_index.add(event)
+
+            if idempotency_key:
+                self._idempotency[idempotency_key] = {
+                    'uid': event_uid,
+                    'result': result,
+                    'created': datetime.datetime.now().isoformat()
+                }
+                self._idempotency = self._prune_idempotency(self._idempotency)
+                self._save_idempotency()
+            return result
         except Exception as e:
             return f"Ошибка создания события: {str(e)}"
 
+    async def save_event_object(self, event_uid: str, ical: str) -> bool:
+        """
+        Сохранить готовый объект iCal (например, при импорте), не перезаписывая существующий
+
+        Args:
+            event_uid (str): UID события
+            ical (str): Полный текст объекта VCALENDAR
+
+        Returns:
+            bool: True, если объект создан, False, если событие с таким UID уже есть
+        """
+        created = await self._run_caldav(self._put_new_event, event_uid, ical)
+        if created and self.day_index:
+            self.day_index.invalidate()
+        return created
+
+    async def add_event_components(self, event_uid: str, ical: str) -> str:
+        """
+        Дописать в существующий объект события компоненты с тем же UID
+        (например, переопределения повторений, идущие в файле .ics не подряд с серией)
+
+        Args:
+            event_uid (str): UID события
+            ical (str): Текст объекта VCALENDAR с дополнительными VEVENT
+
+        Returns:
+            str: "ok", "unchanged", "not_found" или "conflict"
+        """
+        status = await self._run_caldav(self._add_components, event_uid, ical)
+        if status == "ok" and self.day_index:
+            self.day_index.invalidate()
+        return status
+
     async def delete_event(self, event_uid: str) -> str:
         """
         Удалить событие по UID
@@ -209,10 +1158,16 @@ END:VCALENDAR"""
         Returns:
             str: Сообщение о результате удаления события
         """
-        if not self.caldav_calendar:
+        if not await self.ensure_writable():
             return "CalDAV не настроен"
+
+        if self.write_queue:
+            # Удаление сразу скрывает событие, на сервер оно уйдет в фоне
+            self.write_queue.enqueue_delete(event_uid)
+            if self.day_index:
+                self.day_index.remove(event_uid)
+            return f"Событие {event_uid} успешно удалено (синхронизация с календарем выполняется в фоне)"
         
-        import asyncio  
         try:
             # Выполняем синхронные операции CalDAV в отдельном потоке
             def _delete_event():
@@ -222,71 +1177,229 @@ END:VCALENDAR"""
                     return f"Событие {event_uid} успешно удалено"
                 return "Событие не найдено"
                 
-            result = await asyncio.to_thread(_delete_event)
+            result = await self._run_caldav(_delete_event)
+            # Индекс меняется только после удаления на сервере: при ошибке событие остается
+            if self.day_index and "успешно" in result:
+                self.day_index.remove(event_uid)
             return result
         except Exception as e:
             return f"Ошибка удаления: {str(e)}"
 
-    async def get_upcoming_events(self, days: int = 90, format_type: str = "json") -> Union[str, Dict[str, Any]]:
+    async def cancel_occurrence(self, event_uid: str, occurrence_start: datetime.datetime) -> str:
+        """
+        Отменить одно повторение серии, не трогая остальные
+
+        Добавляет EXDATE в существующий объект одним условным PUT.
+
+        Args:
+            event_uid (str): UID серии
+            occurrence_start (datetime.datetime): Исходное время начала отменяемого повторения
+
+        Returns:
+            str: Сообщение о результате отмены
+        """
+        if not await self.ensure_connected():
+            return "CalDAV не настроен"
+
+        try:
+            status = await self._run_caldav(
+                self._update_event_object, event_uid,
+                lambda ical: self._add_exdate(ical, occurrence_start)
+            )
+        except Exception as e:
+            return f"Ошибка отмены повторения: {str(e)}"
+
+        if status == "not_found":
+            return "Событие не найдено"
+        if status == "conflict":
+            return "Ошибка отмены повторения: событие одновременно изменяется, повторите попытку"
+        if self.write_queue:
+            self.write_queue.forget_etag(event_uid)
+        if self.day_index:
+            self.day_index.invalidate()
+        return f"Повторение {occurrence_start.strftime('%d.%m.%Y %H:%M')} события {event_uid} успешно отменено"
+
+    async def modify_occurrence(self, event_uid: str, occurrence_start: datetime.datetime,
+                                start: Optional[datetime.datetime] = None,
+                                end: Optional[datetime.datetime] = None,
+                                title: Optional[str] = None,
+                                description: Optional[str] = None) -> str:
+        """
+        Изменить одно повторение серии, не переписывая всю серию
+
+        Добавляет переопределение (VEVENT с RECURRENCE-ID) в существующий
+        объект одним условным PUT.
+
+        Args:
+            event_uid (str): UID серии
+            occurrence_start (datetime.datetime): Исходное время начала повторения
+            start (datetime.datetime, optional): Новое время начала
+            end (datetime.datetime, optional): Новое время окончания. По умолчанию
+                сохраняется длительность серии
+            title (str, optional): Новое название
+            description (str, optional): Новое описание
+
+        Returns:
+            str: Сообщение о результате изменения
+        """
+        if not await self.ensure_connected():
+            return "CalDAV не настроен"
+
+        try:
+            status = await self._run_caldav(
+                self._update_event_object, event_uid,
+                lambda ical: self._add_override(ical, occurrence_start, start, end, title, description)
+            )
+        except Exception as e:
+            return f"Ошибка изменения повторения: {str(e)}"
+
+        if status == "not_found":
+            return "Событие не найдено"
+        if status == "conflict":
+            return "Ошибка изменения повторения: событие одновременно изменяется, повторите попытку"
+        if self.write_queue:
+            self.write_queue.forget_etag(event_uid)
+        if self.day_index:
+            self.day_index.invalidate()
+        return f"Повторение {occurrence_start.strftime('%d.%m.%Y %H:%M')} события {event_uid} успешно изменено"
+
+    def _fetch_events(self, start: datetime.datetime, end: datetime.datetime) -> List[Dict[str, Any]]:
+        """
+        Получить и разобрать события за период
+
+        Выполняется синхронно, вызывать из отдельного потока.
+        """
+        # Получаем события за указанный период. Повторения серий разворачиваются:
+        # каждое повторение приходит отдельным VEVENT внутри объекта серии
+        events = self.caldav_calendar.date_search(
+            start=start,
+            end=end,
+            expand=True
+        )
+        
+        if not events:
+            return []
+        
+        # Список для хранения данных событий
+        events_data = []
+        
+        for event in events:
+            try:
+                # Получить полные данные события (по словарю на каждое повторение)
+                for event_data in self._parse_ical_events(event.data):
+                    # Получаем URL события (для обновления/удаления) - преобразуем в строку
+                    event_data["url"] = str(event.url)
+                    events_data.append(event_data)
+            except Exception as e:
+                print(f"Ошибка при обработке события: {str(e)}", file=sys.stderr)
+                continue
+        
+        return events_data
+
+    async def fetch_events(self, start: datetime.datetime, end: datetime.datetime,
+                           fresh: bool = False) -> List[Dict[str, Any]]:
+        """
+        Получить разобранные события за период
+
+        Одинаковые одновременные запросы объединяются в один запрос к серверу.
+
+        Args:
+            start, end: Период
+            fresh (bool): Не присоединяться к запросу, начатому раньше (его ответ
+                может не учитывать только что выполненные изменения)
+
+        Returns:
+            List[Dict[str, Any]]: Список событий (новый список для каждого вызова)
+        """
+        if fresh:
+            events = await self._run_caldav(self._fetch_events, start, end)
+        else:
+            events = list(await self._coalesce(("events", start, end), self._fetch_events, start, end))
+        if self.write_queue:
+            events = self.write_queue.apply_overlay(events, start, end)
+        return events
+
+    def _search_objects(self, start: datetime.datetime, end: datetime.datetime) -> List[str]:
+        """
+        Сырые объекты iCal за период, как они хранятся на сервере
+
+        Серии не разворачиваются: объект содержит основной VEVENT с RRULE
+        и переопределения, поэтому его можно сохранить и восстановить без потерь.
+        Выполняется синхронно, вызывать из отдельного потока.
+        """
+        return [event.data for event in self.caldav_calendar.date_search(start=start, end=end, expand=False)]
+
+    async def search_event_objects(self, start: datetime.datetime, end: datetime.datetime) -> List[str]:
+        """
+        Получить сырые объекты iCal за период (например, для экспорта)
+
+        Returns:
+            List[str]: Тексты объектов VCALENDAR
+        """
+        return list(await self._coalesce(("objects", start, end), self._search_objects, start, end))
+
+    async def get_events(self, start: datetime.datetime, end: datetime.datetime) -> List[Dict[str, Any]]:
+        """
+        Получить события за период, отсортированные по началу
+
+        Периоды в пределах горизонта индекса по дням (сегодня, завтра, неделя)
+        обслуживаются из индекса, остальные запрашиваются с сервера.
+
+        Returns:
+            List[Dict[str, Any]]: Список событий
+        """
+        if self.day_index and self.day_index.covers(start, end):
+            missing = self.day_index.missing_range(datetime.date.today())
+            if missing:
+                range_start, range_end, rebuild = missing
+                generation = self.day_index.generation
+                events = await self.fetch_events(range_start, range_end)
+                if not self.day_index.load(events, range_start, range_end, rebuild, generation):
+                    # Пока шел запрос, событие создано или удалено: снимок его не учитывает,
+                    # поэтому отвечаем новым запросом, а индекс загрузит следующий вызов
+                    events = await self.fetch_events(start, end, fresh=True)
+                    events.sort(key=lambda x: x.get('start_time', ''))
+                    return events
+            return self.day_index.query(start, end)
+
+        events = await self.fetch_events(start, end)
+        events.sort(key=lambda x: x.get('start_time', ''))
+        return events
+
+    async def get_upcoming_events(self, days: int = 90, format_type: str = "json",
+                                  start: Optional[datetime.datetime] = None,
+                                  end: Optional[datetime.datetime] = None) -> Union[str, Dict[str, Any]]:
         """
         Получить предстоящие события из календаря
         
         Args:
             days (int): Количество дней для просмотра предстоящих событий. По умолчанию: 90.
             format_type (str): Формат вывода: "text" или "json". По умолчанию: "json".
+            start (datetime.datetime, optional): Начало периода. По умолчанию: текущий момент.
+            end (datetime.datetime, optional): Конец периода. По умолчанию: start + days.
             
         Returns:
             Union[str, Dict[str, Any]]: Форматированный текст или JSON со списком событий, или сообщение об ошибке
         """
-        if not self.caldav_calendar:
+        if not await self.ensure_connected():
             return "CalDAV не настроен"
         
-        import asyncio    
         try:
-            # Вычисляем даты начала и конца периода
-            start = datetime.datetime.now()
-            end = start + datetime.timedelta(days=days)
-            
-            # Выполняем синхронные операции в отдельном потоке
-            def _get_events():
-                # Получаем события за указанный период
-                events = self.caldav_calendar.date_search(
-                    start=start,
-                    end=end
-                )
-                
-                if not events:
-                    return []
-                
-                # Список для хранения данных событий
-                events_data = []
-                
-                for event in events:
-                    try:
-                        # Получить полные данные события
-                        event_data = self._parse_ical_event(event.data)
-                        
-                        # Получаем URL события (для обновления/удаления) - преобразуем в строку
-                        event_data["url"] = str(event.url)
-                        
-                        events_data.append(event_data)
-                    except Exception as e:
-                        print(f"Ошибка при обработке события: {str(e)}")
-                        continue
-                
-                return events_data
+            # Вычисляем даты начала и конца периода. Начало округляется до минуты,
+            # чтобы одновременные одинаковые вызовы объединялись в один запрос
+            if start is None:
+                start = datetime.datetime.now().replace(second=0, microsecond=0)
+            if end is None:
+                end = start + datetime.timedelta(days=days)
             
-            # Выполняем в отдельном потоке, чтобы не блокировать асинхронный контекст
-            events_data = await asyncio.to_thread(_get_events)
+            events_data = await self.get_events(start, end)
             
             if not events_data:
                 if format_type.lower() == "json":
                     return {"events": [], "count": 0}
                 return "Нет предстоящих событий"
             
-            # Сортируем события по дате начала
-            events_data.sort(key=lambda x: x.get('start_time', ''))
-            
+            # get_events уже возвращает события по порядку начала
             if format_type.lower() == "json":
                 return {
                     "events": events_data,